@@ -0,0 +1,223 @@
+#!/usr/bin/python3
+
+#################################################################################################
+########################################## Imports ##############################################
+#################################################################################################
+
+
+import argparse
+import json
+import os
+import random
+import selectors
+import signal
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+
+#################################################################################################
+######################################### Instances #############################################
+#################################################################################################
+
+
+# Generate the pigeon hole problem PHP(n+1, n) (each pigeon is in a hole, two pigeons are not in the
+# same hole)
+def pigeonHoleProblem(n):
+    clauses = []
+    var = lambda pigeon, hole : pigeon * n + hole + 1
+    for pigeon in range(n + 1):
+        clauses.append([var(pigeon, hole) for hole in range(n)])
+    for hole in range(n):
+        for p1 in range(n + 1):
+            for p2 in range(p1 + 1, n + 1):
+                clauses.append([-var(p1, hole), -var(p2, hole)])
+    return ((n + 1) * n, clauses)
+
+# Generate the functional pigeon hole problem: PHP(n+1, n) where a pigeon is in one hole at most
+def functionalPigeonHole(n):
+    nVariables, clauses = pigeonHoleProblem(n)
+    var = lambda pigeon, hole : pigeon * n + hole + 1
+    for pigeon in range(n + 1):
+        for h1 in range(n):
+            for h2 in range(h1 + 1, n):
+                clauses.append([-var(pigeon, h1), -var(pigeon, h2)])
+    return (nVariables, clauses)
+
+# Generate the onto functional pigeon hole problem: the functional problem where each hole gets a pigeon
+def ontoPigeonHole(n):
+    nVariables, clauses = functionalPigeonHole(n)
+    var = lambda pigeon, hole : pigeon * n + hole + 1
+    for hole in range(n):
+        clauses.append([var(pigeon, hole) for pigeon in range(n + 1)])
+    return (nVariables, clauses)
+
+# Embed PHP(n+1, n) in random 3-SAT noise: ratio * nVariables clauses of 3 literals are added over the
+# variables of the pigeon hole problem and as many new variables, then the variables are renamed and
+# the clauses are shuffled
+def noisyPigeonHole(n, rand, ratio=2.0):
+    nVariables, clauses = pigeonHoleProblem(n)
+    nVariables *= 2
+    for _ in range(int(ratio * nVariables)):
+        clauses.append([var if rand.random() < 0.5 else -var for var in rand.sample(range(1, nVariables + 1), 3)])
+    rename = list(range(1, nVariables + 1))
+    rand.shuffle(rename)
+    clauses = [[rename[abs(lit) - 1] if lit > 0 else -rename[abs(lit) - 1] for lit in clause] for clause in clauses]
+    rand.shuffle(clauses)
+    return (nVariables, clauses)
+
+# Get the residual formula of PHP(n+1+fixed, n+fixed) where the first fixed pigeons are put in the first
+# holes: the satisfied clauses are removed and the falsified literals are removed from the clauses (the
+# unit clauses left give the other pigeons which can't go in these holes), so PHP(n+1, n) remains
+def residualPigeonHole(n, fixed=2):
+    nVariables, clauses = pigeonHoleProblem(n + fixed)
+    var = lambda pigeon, hole : pigeon * (n + fixed) + hole + 1
+    assignment = set()
+    for pigeon in range(fixed):
+        for hole in range(n + fixed):
+            assignment.add(var(pigeon, hole) if hole == pigeon else -var(pigeon, hole))
+    residual = []
+    for clause in clauses:
+        if not any(lit in assignment for lit in clause):
+            residual.append([lit for lit in clause if -lit not in assignment])
+    return (nVariables, residual)
+
+# Families of generated instances (the random families get a generator)
+FAMILIES = {"php": (lambda n, rand : pigeonHoleProblem(n)),
+            "functional": (lambda n, rand : functionalPigeonHole(n)),
+            "onto": (lambda n, rand : ontoPigeonHole(n)),
+            "noisy": noisyPigeonHole,
+            "residual": (lambda n, rand : residualPigeonHole(n))}
+
+# Write an instance in the DIMACS format
+def writeDimacs(filename, nVariables, clauses):
+    with open(filename, "w") as file:
+        file.write("p cnf %d %d\n" % (nVariables, len(clauses)))
+        for clause in clauses:
+            file.write(" ".join(str(lit) for lit in clause) + " 0\n")
+
+
+#################################################################################################
+########################################## Variants #############################################
+#################################################################################################
+
+
+# Detectors compared (scripts of the parent folder and their options): the original scripts, the
+# watched literals versions and the two modes of the sampling (detection after the search or during it)
+VARIANTS = {"pigeonPur": ["pigeonPur.py"],
+            "pigeonPur2": ["pigeonPur2.py"],
+            "pigeonPurSampling": ["pigeonPurSampling.py"],
+            "pigeonPurSampling2": ["pigeonPurSampling2.py"],
+            "pigeonPurSampling2-stream": ["pigeonPurSampling2.py", "--stream"]}
+
+# Run a detector on an instance until it ends or until a budget is exhausted (the detector is then
+# interrupted with SIGINT, as by hand, and prints its pigeons before leaving)
+# The nodes are the lines giving the result of a detection ("decisions -> result"), the budgets are
+# applied from outside so they are counted in the same way for all the variants
+# Return the measures of the run
+def runVariant(variant, instance, maxTime, maxNodes, grace=10.0):
+    folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    command = [sys.executable, os.path.join(folder, VARIANTS[variant][0]), instance] + VARIANTS[variant][1:]
+    start = perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                               env=dict(os.environ, PYTHONUNBUFFERED="1"))
+    # The output is read by chunks as soon as it is written (a buffered reader would hide the lines
+    # already read from the selector)
+    selector = selectors.DefaultSelector()
+    selector.register(process.stdout, selectors.EVENT_READ)
+    nodes, detections, firstPigeon, answer = 0, 0, None, None
+    interrupted, final, deadline = False, False, start + maxTime
+    pending = b""
+    while True:
+        remaining = deadline - perf_counter()
+        if remaining <= 0 or selector.select(remaining) == []:
+            if interrupted:
+                # The detector doesn't answer to SIGINT
+                process.kill()
+                break
+            process.send_signal(signal.SIGINT)
+            interrupted, deadline = True, perf_counter() + grace
+            continue
+        chunk = os.read(process.stdout.fileno(), 65536)
+        if chunk == b"":
+            break
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            line = line.decode()
+            head, sep, result = line.rpartition(" -> ")
+            if sep != "" and head.startswith("[") and not interrupted:
+                nodes += 1
+                if result.strip().startswith("ph"):
+                    detections += 1
+                    if firstPigeon is None:
+                        firstPigeon = perf_counter() - start
+                if maxNodes is not None and nodes >= maxNodes:
+                    process.send_signal(signal.SIGINT)
+                    interrupted, deadline = True, perf_counter() + grace
+            elif line.startswith("Final result:"):
+                final = True
+            elif final and answer is None and line.strip() != "":
+                answer = line.strip()
+    elapsed = perf_counter() - start
+    selector.close()
+    process.stdout.close()
+    # The peak memory of the detector is given by the resources of its process
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if interrupted:
+        status = "BUDGET"
+    elif answer is None:
+        status = "DONE" if process.returncode == 0 else "ERROR"
+    elif answer.startswith("['SAT'"):
+        status = "SAT"
+    elif answer.startswith("UNKNOWN"):
+        status = "BUDGET"
+    else:
+        status = "UNSAT"
+    return {"variant": variant, "status": status, "time": round(elapsed, 4), "nodes": nodes,
+            "nodesPerSecond": round(nodes / elapsed, 2), "detections": detections,
+            "detectionsPerSecond": round(detections / elapsed, 2), "peakRssMB": round(usage.ru_maxrss / 1024, 2),
+            "timeToFirstPigeon": round(firstPigeon, 4) if firstPigeon is not None else None}
+
+
+#################################################################################################
+############################################ Main ###############################################
+#################################################################################################
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the detectors on generated pigeon hole instances, one JSON object per run")
+    parser.add_argument("--families", nargs="+", choices=sorted(FAMILIES), default=sorted(FAMILIES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[3, 4, 5, 6], help="number of holes of the pigeon hole problems")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument("--max-time", type=float, default=30.0, help="time limit of a run (seconds)")
+    parser.add_argument("--max-nodes", type=int, default=1000, help="node limit of a run")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random families")
+    parser.add_argument("--instances", metavar="FOLDER", help="folder where the instances are kept (temporary by default)")
+    parser.add_argument("--output", metavar="FILE", help="file of the results (standard output by default)")
+    args = parser.parse_args()
+
+    output = open(args.output, "w") if args.output is not None else sys.stdout
+    with tempfile.TemporaryDirectory() as temporary:
+        folder = args.instances if args.instances is not None else temporary
+        os.makedirs(folder, exist_ok=True)
+        for family in args.families:
+            for n in args.sizes:
+                # Each instance has its own generator, so it doesn't depend on the other instances
+                nVariables, clauses = FAMILIES[family](n, random.Random("%d-%s-%d" % (args.seed, family, n)))
+                instance = os.path.join(folder, "%s-%d.cnf" % (family, n))
+                writeDimacs(instance, nVariables, clauses)
+                for variant in args.variants:
+                    result = runVariant(variant, instance, args.max_time, args.max_nodes)
+                    entry = {"family": family, "holes": n, "variables": nVariables, "clauses": len(clauses)}
+                    entry.update(result)
+                    output.write(json.dumps(entry) + "\n")
+                    output.flush()
+    if output is not sys.stdout:
+        output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/python3
+
+#################################################################################################
+########################################## Imports ##############################################
+#################################################################################################
+
+
+import os
+import sys
+from collections import deque
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pigeon import PigeonDetector
+from pigeon.bitmasks import updateMark
+
+
+#################################################################################################
+######################################### Functions #############################################
+#################################################################################################
+
+
+# Generate the pigeon hole problem PHP(n+1, n)
+# The node puts the first n - 1 pigeons in the first holes, its propagation excludes the other pigeons
+# from these holes and ends on a conflict (the last two pigeons are left with one hole)
+def pigeonHoleProblem(n):
+    clauses = []
+    var = lambda pigeon, hole : pigeon * n + hole + 1
+    # Each pigeon is in a hole
+    for pigeon in range(n + 1):
+        clauses.append([var(pigeon, hole) for hole in range(n)])
+    # Two pigeons are not in the same hole
+    for hole in range(n):
+        for p1 in range(n + 1):
+            for p2 in range(p1 + 1, n + 1):
+                clauses.append([-var(p1, hole), -var(p2, hole)])
+    return ((n + 1) * n, clauses, [var(pigeon, pigeon) for pigeon in range(n - 1)])
+
+# Generate a fan of implications: the first variable implies the size next ones (binary clauses)
+# The node assigns the first variable: its watch list and the queue of the propagation hold size literals
+def implicationFan(size):
+    return (size + 1, [[-1, var] for var in range(2, size + 2)], [1])
+
+# Generate clauses of three literals watched by the same literal: the first variable falsifies the first
+# literal of size clauses, each watch is moved to the third literal of its clause
+# The node assigns the first variable: its watch list holds size clauses which are all replaced
+def watchedFan(size):
+    return (2 * size + 1, [[-1, var, var + size] for var in range(2, size + 2)], [1])
+
+# Generate a tree of implications over size variables (each variable implies its two children)
+# The node assigns the root: the propagation goes down the tree level by level, so the queue holds up
+# to a whole level of the tree
+def implicationTree(size):
+    clauses = [[-(var // 2), var] for var in range(2, size + 1)]
+    return (size, clauses, [1])
+
+# Previous watches, lists of [blocker] (binary clause) or [blocker, clause] referencing the clause lists
+def legacyWatchClause(watches, clause):
+    lit, other = clause[0], clause[1]
+    watches[lit].append([other] if len(clause) == 2 else [other, clause])
+    watches[other].append([lit] if len(clause) == 2 else [lit, clause])
+
+# Previous search of a replacing literal in a clause list
+def searchReplacement(watch, assigned):
+    replacement, satisfied = None, False
+    for ind in range(2, len(watch[1])):
+        if assigned[watch[1][ind]] == 1:
+            satisfied = True
+            break
+        elif assigned[-watch[1][ind]] == 0:
+            replacement = ind
+            break
+    return (replacement, satisfied)
+
+# Previous version of replaceWatch, rotating the watch list with pop(0) and append
+def legacyReplaceWatch(watches, notLit, assigned, toAssign, toProp, ignoreConflicts):
+    for _ in range(len(watches[notLit])):
+        w = watches[notLit].pop(0)
+        if assigned[w[0]] == 1:
+            watches[notLit].append(w)
+            continue
+        if len(w) == 1:
+            watches[notLit].append(w)
+            if assigned[-w[0]] == 1:
+                if not ignoreConflicts:
+                    return False
+            elif assigned[w[0]] == 0 and toAssign[w[0]] == 0:
+                toAssign[w[0]] = 1
+                toProp.append(w[0])
+        else:
+            block = w[1][0] ^ w[1][1] ^ notLit
+            w[0] = block
+            w[1][0] = notLit
+            w[1][1] = block
+            replacement, satisfied = searchReplacement(w, assigned)
+            if satisfied:
+                watches[notLit].append(w)
+                continue
+            if replacement is None:
+                watches[notLit].append(w)
+                if assigned[-block] == 1:
+                    if not ignoreConflicts:
+                        return False
+                elif assigned[block] == 0 and toAssign[block] == 0:
+                    toAssign[block] = 1
+                    toProp.append(block)
+            else:
+                w[1][0], w[1][replacement] = w[1][replacement], w[1][0]
+                watches[w[1][0]].append(w)
+    return True
+
+
+# Detector using the previous propagation (list queues consumed with pop(0) and nested watch lists)
+class LegacyDetector(PigeonDetector):
+
+    # Build the structures of an instance with the previous watches
+    def load(self, clauses, nVariables=None):
+        super().load(clauses, nVariables)
+        self.watches = [[] for _ in range(2 * self.nVariables + 1)]
+        for clause in self.formula:
+            legacyWatchClause(self.watches, clause[1].copy())
+
+    # Perform the unit propagation with the previous queue and watches
+    def unitPropagation(self, literal, toPropagate, marksLiterals, marker, ignoreConflicts, keepModifs):
+        toPropagate = list(toPropagate)
+        propagated = []
+        if keepModifs and toPropagate != []:
+            self.implications.clear()
+        while toPropagate != []:
+            propagate = toPropagate.pop(0)
+            propagated.append(propagate)
+            self.assigned[propagate] = 1
+            self.toAssign[propagate] = 0
+            if keepModifs:
+                self.residual.assign(propagate)
+            if propagate != literal:
+                updateMark(marksLiterals, -propagate, marker)
+            if propagate != 0:
+                if not legacyReplaceWatch(self.watches, -propagate, self.assigned, self.toAssign, toPropagate, ignoreConflicts):
+                    if not keepModifs:
+                        self.undoPropagations(propagated)
+                    for lit in toPropagate:
+                        self.toAssign[lit] = 0
+                    return ("UNSAT", propagated)
+        if not keepModifs:
+            self.undoPropagations(propagated)
+        return ("UNKNOWN", propagated)
+
+# Time the propagation of a node, as in the search: the literals of the node are propagated with their
+# consequences until a conflict (the modifications are kept), then they are unassigned
+def timeNode(detector, instance, repeat):
+    nVariables, clauses, node = instance
+    detector.load(clauses, nVariables)
+    start = perf_counter()
+    for _ in range(repeat):
+        for lit in node:
+            detector.toAssign[lit] = 1
+        _, propagations = detector.unitPropagation(0, deque(node), [], -1, False, True)
+        detector.backtrack(propagations)
+    return perf_counter() - start
+
+
+#################################################################################################
+############################################ Main ###############################################
+#################################################################################################
+
+
+# Sizes of the fans and of the trees
+SIZES = [1000, 10000, 50000]
+
+def main():
+    maxHoles = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    instances = [("PHP(%d,%d)" % (n + 1, n), pigeonHoleProblem(n)) for n in range(2, maxHoles + 1)]
+    for size in SIZES:
+        instances.append(("fan(%d)" % size, implicationFan(size)))
+        instances.append(("watched(%d)" % size, watchedFan(size)))
+        instances.append(("tree(%d)" % size, implicationTree(size)))
+    print("%-16s %12s %12s %8s" % ("instance", "pop(0) (s)", "deque (s)", "speedup"))
+    for name, instance in instances:
+        legacy = timeNode(LegacyDetector(), instance, repeat)
+        current = timeNode(PigeonDetector(), instance, repeat)
+        print("%-16s %12.4f %12.4f %8.2f" % (name, legacy, current, legacy / current))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+from .cache import PigeonCache
+from .detector import PigeonDetector
+from .dimacs import readDimacs, readOrder
+from .dpll import dpll, search
+from .heuristics import DecisionOrder, OccurrenceHeuristic, PigeonFirstHeuristic, VsidsHeuristic
+from .registry import KnownPigeons
+from .residual import ResidualFormula
+from .sampling import BranchSampler
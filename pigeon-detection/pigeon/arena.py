@@ -0,0 +1,29 @@
+#################################################################################################
+########################################## Imports ##############################################
+#################################################################################################
+
+
+from array import array
+
+
+#################################################################################################
+######################################## Clause Arena ###########################################
+#################################################################################################
+
+
+# Clauses stored one after the other in a single array of literals
+# A clause is referenced by its index: its literals are literals[starts[ref]:starts[ref] + sizes[ref]]
+class ClauseArena:
+
+    # Create an empty arena
+    def __init__(self):
+        self.literals = array('i')
+        self.starts = array('i')
+        self.sizes = array('i')
+
+    # Add a clause at the end of the arena and return its reference
+    def add(self, clause):
+        self.starts.append(len(self.literals))
+        self.sizes.append(len(clause))
+        self.literals.extend(clause)
+        return len(self.starts) - 1
@@ -0,0 +1,99 @@
+#################################################################################################
+########################################## Imports ##############################################
+#################################################################################################
+
+
+from itertools import compress
+
+
+#################################################################################################
+########################################## Bitmasks #############################################
+#################################################################################################
+
+
+# Get the bitmask of the variables of a clause (bit v is set if the variable v occurs in the clause)
+# If a numbering is given (dictionary filled as new variables are met), the bit of a variable is its
+# number, so the bitmasks of a few clauses stay small whatever the number of variables of the instance
+def variablesMask(clause, numbering=None):
+    mask = 0
+    for lit in clause:
+        if numbering is None:
+            mask |= 1 << abs(lit)
+        else:
+            mask |= 1 << numbering.setdefault(abs(lit), len(numbering))
+    return mask
+
+# Get the position of a literal in a bitset of literals (2v for v and 2v+1 for -v)
+def literalBit(lit):
+    return 2 * abs(lit) + (lit < 0)
+
+# Update the marks of a literal or a clause
+def updateMark(marks, index, marker):
+    if marker > 0:
+        marks[index] |= (1 << (marker - 1))
+
+# Perform a unit propagation with the bitmasks: the mark remove (-1 for none) is removed from the
+# bitmasks, then the mark of each bitmask with only one mark is removed from the other bitmasks, until
+# there is no new one (the marks of a round are removed together)
+# Return the simplified bitmasks ([] if a bitmask gets empty or if two bitmasks keep the same single mark)
+def unitPropagationBitmask(marks, remove, lenClause):
+    if remove >= 0:
+        removed = ~(1 << remove)
+        newMarks = [mark & removed for mark in marks]
+    else:
+        newMarks = marks.copy()
+    propagated = 0
+    while True:
+        if 0 in newMarks:
+            # Empty bitmask
+            return []
+        # Bitmasks with only one mark 1 (x & (x - 1) clears the lowest mark), not propagated yet
+        single = 0
+        for mark in newMarks:
+            if mark & (mark - 1) == 0 and mark & propagated == 0:
+                if mark & single:
+                    # Two bitmasks with the same single mark
+                    return []
+                single |= mark
+        if single == 0:
+            return newMarks
+        propagated |= single
+        # Remove the marks from the other bitmasks (the bitmasks with a single mark are kept)
+        newMarks = [mark if mark & (mark - 1) == 0 else mark & ~single for mark in newMarks]
+
+# Get the bitmasks of the marks of the literals of clauses of the size of the starting clause (one row
+# per clause, one bitmask per literal), built in one pass over the clauses
+# A clause can only be reordered if each literal has a mark and if its literals have all the marks
+# (the marks of a reordering are all different), the other rows are filtered out
+# Return the indices of the clauses kept and their rows
+def markMatrix(marksLiterals, clauses, lenClause):
+    full = (1 << lenClause) - 1
+    rows = [[marksLiterals[lit] for lit in clause] for clause in clauses]
+    kept = []
+    for row in rows:
+        union = 0
+        for mark in row:
+            union |= mark
+        kept.append(union == full and 0 not in row)
+    return (list(compress(range(len(clauses)), kept)), list(compress(rows, kept)))
+
+# Generate all the possible combinations of marks for a clause (lazily, the next combination is only
+# computed when it is asked for)
+# Each combination is reached by its own sequence of fixed marks, so the combinations are all different
+# and they don't have to be deduplicated
+def combinations(clause, marks, combi):
+    if len(marks) == 0:
+        # A combination is good only if it is of the same size than the starting clause
+        if len(combi) == len(clause[1]):
+            yield combi.copy()
+        return
+    # We get the next bitmask
+    bitmask, marks = marks[0], marks[1:]
+    for i in range(len(clause[1])):
+        # If we find a mark 1, we fix it for the current position and we propagate it
+        if (bitmask & 1 << i) != 0:
+            simplified = unitPropagationBitmask(marks, i, len(clause[1]))
+            combi.append(1 << i)
+            # We consider the next bitmask
+            yield from combinations(clause, simplified, combi)
+            combi.pop()
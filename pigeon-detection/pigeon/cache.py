@@ -0,0 +1,73 @@
+#################################################################################################
+########################################## Imports ##############################################
+#################################################################################################
+
+
+import json
+import os
+import sqlite3
+
+
+#################################################################################################
+######################################## Pigeon Cache ###########################################
+#################################################################################################
+
+
+# Get the key of a detection in the cache: the fingerprint of the residual formula and of its starting
+# clauses (see ResidualFormula.fingerprint) and the sizes of the pigeons, so the same residual formula
+# of two related instances has the same key
+def residualKey(fingerprint, minPigeons, maxPigeons):
+    return "%d %d %016x %016x" % (minPigeons, maxPigeons, fingerprint[0], fingerprint[1])
+
+
+# Results of the detections stored in a SQLite database, shared by several runs
+# Each result is the pigeon found (its clauses, as lists of literals) or an empty list if there is none
+class PigeonCache:
+
+    # Open (or create) the database, the processes waiting for the lock of another process give up after
+    # timeout seconds
+    def __init__(self, path, timeout=60.0):
+        self.path = path
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.connect()
+
+    # Open the connection to the database (a forked process opens its own connection)
+    # The journal is written ahead of the database (WAL), so the readers don't wait for the writers
+    def connect(self):
+        self.pid = os.getpid()
+        self.connection = sqlite3.connect(self.path, timeout=self.timeout)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS pigeons (fingerprint TEXT PRIMARY KEY, pigeon TEXT)")
+        self.connection.commit()
+
+    # Get the connection of the current process
+    def database(self):
+        if self.connection is None or self.pid != os.getpid():
+            self.connect()
+        return self.connection
+
+    # Get the result stored for a fingerprint, None if there is no result
+    def get(self, key):
+        row = self.database().execute("SELECT pigeon FROM pigeons WHERE fingerprint = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    # Store the result of a detection
+    # Each result is committed at once, so the lock of the database is only held during the write
+    def put(self, key, clauses):
+        database = self.database()
+        database.execute("INSERT OR REPLACE INTO pigeons VALUES (?, ?)", (key, json.dumps(clauses)))
+        database.commit()
+
+    # Close the connection of the current process (the connection inherited from the parent process
+    # is left to the parent), it is opened again by the next access
+    def close(self):
+        if self.connection is not None and self.pid == os.getpid():
+            self.connection.commit()
+            self.connection.close()
+        self.connection = None
@@ -0,0 +1,75 @@
+#################################################################################################
+########################################## Imports ##############################################
+#################################################################################################
+
+
+import argparse
+
+from .cache import PigeonCache
+from .detector import PigeonDetector
+from .dimacs import readDimacs, readOrder
+from .heuristics import DecisionOrder, OccurrenceHeuristic, PigeonFirstHeuristic, VsidsHeuristic
+from .output import MODES, NodeOutput
+
+
+#################################################################################################
+###################################### Command Line #############################################
+#################################################################################################
+
+
+# Heuristics which can be chosen from the command line
+HEURISTICS = {"occurrences": OccurrenceHeuristic, "vsids": VsidsHeuristic, "pigeons": PigeonFirstHeuristic}
+
+# Build the parser of the command line shared by the detectors
+# The sampling options are only added for the sampling detectors
+# The drivers searching on a ResidualFormula (residual) don't explore subtrees with processes and don't
+# detect the pigeons during the sampling, these options are not added for them
+def argumentParser(description, sampling=False, residual=False):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("instance", help="instance in the DIMACS format (.gz, .xz and .bz2 are accepted)")
+    detection = parser.add_argument_group("detection")
+    detection.add_argument("--min-pigeons", type=int, default=2, help="minimum size of the clauses of a pigeon")
+    detection.add_argument("--max-pigeons", type=int, default=64, help="maximum size of the clauses of a pigeon")
+    detection.add_argument("--cache-size", type=int, default=4096, help="number of implications kept on a node")
+    detection.add_argument("--processes", type=int, default=1, help="processes sharing the starting clauses of a detection")
+    detection.add_argument("--cache", metavar="DATABASE", help="SQLite database of the results of the detections")
+    detection.add_argument("--construction", choices=["clique", "dfs"], default="clique",
+                           help="construction of the pigeons: clique search or original depth first search")
+    search = parser.add_argument_group("search")
+    search.add_argument("--heuristic", choices=["none"] + sorted(HEURISTICS), default="none",
+                        help="decision heuristic (none: the first free variable)")
+    search.add_argument("--order", metavar="FILE", help="decisions to force first (order.txt of the C++ solvers)")
+    if not sampling and not residual:
+        search.add_argument("--search-processes", type=int, default=1, help="processes exploring the subtrees")
+        search.add_argument("--split-depth", type=int, default=0, help="depth of the subtrees explored by the processes")
+    elif sampling:
+        search.add_argument("--strategy", choices=["ratio", "reservoir", "stratified"], default="ratio",
+                            help="selection of the branches")
+        search.add_argument("--ratio-branches", type=int, default=100, help="one branch selected every RATIO_BRANCHES (ratio)")
+        search.add_argument("--max-branches", type=int, default=100, help="number of branches to select")
+        search.add_argument("--seed", type=int, help="seed of the random strategies")
+        if not residual:
+            search.add_argument("--stream", action="store_true", help="detect the pigeons during the search")
+    budgets = parser.add_argument_group("budgets")
+    budgets.add_argument("--max-time", type=float, help="time limit of the search (seconds)")
+    budgets.add_argument("--max-nodes", type=int, help="node limit of the search")
+    budgets.add_argument("--max-memory", type=float, help="memory limit of the process (MB)")
+    if sampling:
+        budgets.add_argument("--max-leaves", type=int, help="leaf limit of the search")
+    parser.add_argument("--output", choices=MODES, default="text",
+                        help="text, one JSON object per line, or nothing on the nodes")
+    return parser
+
+# Read the instance given on the command line and build the detector and the heuristic of the search
+# Return the detector (with the formula loaded) and the heuristic ([] if there is none)
+def loadDetector(args):
+    nVariables, clauses = readDimacs(args.instance)
+    cache = PigeonCache(args.cache) if args.cache is not None else None
+    detector = PigeonDetector(minPigeons=args.min_pigeons, maxPigeons=args.max_pigeons, cacheSize=args.cache_size,
+                              processes=args.processes, cache=cache, output=NodeOutput(args.output),
+                              construction=args.construction)
+    detector.load(clauses, nVariables)
+    heuris = HEURISTICS[args.heuristic](detector) if args.heuristic != "none" else None
+    if args.order is not None:
+        heuris = DecisionOrder(detector, list(readOrder(args.order)), heuris)
+    return (detector, heuris if heuris is not None else [])
@@ -0,0 +1,125 @@
+#################################################################################################
+######################################## Clique Search ##########################################
+#################################################################################################
+
+
+# The graphs are given by their adjacency bitsets: bit j of adjacency[i] is set if the vertices i and j
+# are adjacent (no loop)
+
+# Iterate over the vertices of a bitset (ascending order)
+def bitsetVertices(bitset):
+    while bitset:
+        low = bitset & -bitset
+        yield low.bit_length() - 1
+        bitset ^= low
+
+# Get the vertices kept to look for a clique: a single vertex is kept among the vertices with the same
+# neighbours (they are not adjacent, so they are interchangeable in a clique), then the vertices with
+# less than size - 1 neighbours are removed (with their edges) until there is none (k-core)
+# Return the bitset of the kept vertices
+def cliqueCore(adjacency, size):
+    alive = 0
+    twins = set()
+    for vertex in range(len(adjacency)):
+        if adjacency[vertex] not in twins:
+            twins.add(adjacency[vertex])
+            alive |= 1 << vertex
+    removed = True
+    while removed:
+        removed = False
+        for vertex in bitsetVertices(alive):
+            if (adjacency[vertex] & alive).bit_count() < size - 1:
+                alive &= ~(1 << vertex)
+                removed = True
+    return alive
+
+# Get a degeneracy ordering of the vertices of a bitset: the vertex of smallest degree is removed in turn
+# (the vertices are kept in buckets by degree). The vertices are returned in the reverse order of their
+# removal, so the vertices of the densest part of the graph come first
+def degeneracyOrdering(adjacency, alive):
+    degrees = {vertex: (adjacency[vertex] & alive).bit_count() for vertex in bitsetVertices(alive)}
+    buckets = [set() for degree in range(max(degrees.values(), default=0) + 1)]
+    for vertex, degree in degrees.items():
+        buckets[degree].add(vertex)
+    removed = []
+    degree = 0
+    while len(removed) < len(degrees):
+        while not buckets[degree]:
+            degree += 1
+        vertex = buckets[degree].pop()
+        alive &= ~(1 << vertex)
+        removed.append(vertex)
+        for neighbour in bitsetVertices(adjacency[vertex] & alive):
+            buckets[degrees[neighbour]].remove(neighbour)
+            degrees[neighbour] -= 1
+            buckets[degrees[neighbour]].add(neighbour)
+        # Removing a vertex lowers the degrees of its neighbours by one at most
+        degree = max(degree - 1, 0)
+    removed.reverse()
+    return removed
+
+# Color greedily the candidates of a clique (bitset, the vertices are numbered in the order of the
+# search): each color is an independent set, so a clique contains at most one vertex of each color
+# Return the candidates sorted by color and the number of colors used up to each of them
+def colorCandidates(candidates, adjacency):
+    vertices, colors = [], []
+    color = 0
+    while candidates:
+        color += 1
+        # Build a new color class with the first candidates which are not adjacent to it
+        available = candidates
+        while available:
+            low = available & -available
+            vertex = low.bit_length() - 1
+            available &= ~(adjacency[vertex] | low)
+            candidates ^= low
+            vertices.append(vertex)
+            colors.append(color)
+    return (vertices, colors)
+
+# Look for a clique of a given size (list of vertices, None if there is none)
+# The vertices are reduced to a core (cliqueCore) and renumbered in a degeneracy ordering, then the
+# search expands the current clique with the candidates of the highest colors first
+# A branch is cut when the current clique and the number of colors of its candidates can't reach the
+# size
+# The search uses an explicit stack: each level holds its candidates sorted by color, the number of
+# colors and the index of the next candidate to try (the candidates are tried from the last one)
+def findClique(adjacency, size):
+    if size <= 0:
+        return []
+    core = cliqueCore(adjacency, size)
+    if core.bit_count() < size:
+        return None
+    order = degeneracyOrdering(adjacency, core)
+    position = {vertex: ind for ind, vertex in enumerate(order)}
+    renumbered = []
+    for vertex in order:
+        bitset = 0
+        for neighbour in bitsetVertices(adjacency[vertex] & core):
+            bitset |= 1 << position[neighbour]
+        renumbered.append(bitset)
+    clique = []
+    vertices, colors = colorCandidates((1 << len(order)) - 1, renumbered)
+    stack = [[vertices, colors, len(vertices) - 1, (1 << len(order)) - 1]]
+    while stack:
+        level = stack[-1]
+        vertices, colors, ind, candidates = level
+        if ind < 0 or len(clique) + colors[ind] < size:
+            # The remaining candidates of the level can't complete the clique
+            stack.pop()
+            if clique:
+                clique.pop()
+            continue
+        level[2] -= 1
+        vertex = vertices[ind]
+        level[3] &= ~(1 << vertex)
+        clique.append(vertex)
+        if len(clique) == size:
+            return [order[v] for v in clique]
+        newCandidates = candidates & renumbered[vertex]
+        if newCandidates == 0:
+            clique.pop()
+            continue
+        newVertices, newColors = colorCandidates(newCandidates, renumbered)
+        stack.append([newVertices, newColors, len(newVertices) - 1, newCandidates])
+    return None
@@ -0,0 +1,652 @@
+#################################################################################################
+########################################## Imports ##############################################
+#################################################################################################
+
+
+import multiprocessing
+from array import array
+from collections import OrderedDict, deque
+from copy import deepcopy
+from itertools import chain
+
+from .arena import ClauseArena
+from .bitmasks import variablesMask, updateMark, unitPropagationBitmask, markMatrix, combinations
+from .cache import residualKey
+from .clique import findClique
+from .implications import BinaryImplicationGraph
+from .output import NodeOutput
+from .residual import ResidualFormula
+from .watches import watchClause, replaceWatch
+
+
+#################################################################################################
+######################################### Functions #############################################
+#################################################################################################
+
+
+# Detector and shared position of the first pigeon found, used by the processes of the pool (inherited
+# when the processes are forked)
+_poolState = None
+
+# Look for a pigeon from the starting clauses of one shard in a process of the pool
+# The process first puts its detector on the node of the parent: it goes back to the root and
+# propagates the literals assigned in the parent (trail). There is no detection on a conflict, as in
+# the sequential search
+# A shard stops as soon as a pigeon has been found from a previous starting clause
+def _detectShard(task):
+    shard, trail, consider = task
+    detector, found = _poolState
+    try:
+        detector.backtrack(list(detector.residual.trail))
+        for lit in trail:
+            detector.toAssign[lit] = 1
+        ans, _ = detector.unitPropagation(0, deque(trail), [], -1, False, True)
+        if ans == "UNSAT":
+            return (None, [])
+        formula = detector.residual.clauses()
+        bySize = detector.clausesBySize(formula)
+        starts = detector.startingClauses(formula, consider)
+        previous = -1
+        for indClause in starts[shard::detector.processes]:
+            if indClause > found.value:
+                break
+            pigeons = detector.detectFrom(formula, consider, bySize, indClause, previous)
+            previous = indClause
+            if pigeons != []:
+                with found.get_lock():
+                    if indClause < found.value:
+                        found.value = indClause
+                return (indClause, pigeons)
+        return (None, [])
+    finally:
+        # The process keeps no transaction open on the cache between two detections
+        if detector.cache is not None:
+            detector.cache.close()
+
+
+#################################################################################################
+########################################## Detector #############################################
+#################################################################################################
+
+
+# Pigeon hole detector holding the structures of one instance
+# The same detector can be reused on several instances: the structures are rebuilt each time a
+# new formula is loaded
+class PigeonDetector:
+
+    # Create a detector looking for pigeons whose clauses have between minPigeons and maxPigeons literals
+    # At most cacheSize implications are kept in the cache of the current node
+    # If processes > 1, the starting clauses are shared between the processes of a pool forked at the
+    # first detection and kept for the next ones (see openPool)
+    # If a PigeonCache is given, the results of the detections are stored in it and reused
+    # The results are printed by output (a NodeOutput), nothing is printed on the nodes by default so the
+    # detector can be used as a library, the scripts give the output of their command line
+    # The pigeons are built from the candidates by a clique search ("clique") or by the original depth
+    # first search ("dfs")
+    def __init__(self, minPigeons=2, maxPigeons=64, cacheSize=4096, processes=1, cache=None, output=None,
+                 construction="clique"):
+        if construction not in ("clique", "dfs"):
+            raise ValueError("unknown construction: " + str(construction))
+        self.minPigeons = minPigeons
+        self.maxPigeons = maxPigeons
+        self.cacheSize = cacheSize
+        self.processes = processes
+        self.cache = cache
+        self.output = output if output is not None else NodeOutput("none")
+        self.construction = construction
+        self.heuristic = None
+        self.implications = OrderedDict()
+        self.clauses = None
+        self.nVariables = 0
+        self.nClauses = 0
+        self.formula = []
+        self.units = []
+        self.pool = None
+        self.poolFound = None
+
+    # Build the structures of an instance (list of clauses, each clause being a list of literals)
+    # The identifier of a clause is its index in the list, the unit clauses are kept apart
+    def load(self, clauses, nVariables=None):
+        if nVariables is None:
+            nVariables = max((abs(lit) for clause in clauses for lit in clause), default=0)
+        # The processes of the pool have the structures of the previous formula
+        self.closePool()
+        self.clauses = clauses
+        self.nVariables = nVariables
+        self.nClauses = len(clauses)
+        self.assigned = [0] * (2 * nVariables + 1)
+        self.toAssign = [0] * (2 * nVariables + 1)
+        self.marksLiterals = [0] * (2 * nVariables + 1)
+        self.watches = [array('i') for _ in range(2 * nVariables + 1)]
+        self.arena = ClauseArena()
+        self.toConsider = [True] * self.nClauses
+        self.blocked = bytearray(self.nClauses)
+        self.formula = []
+        self.units = []
+        for indClause in range(len(clauses)):
+            # The clauses given as lists are not copied (they are only read)
+            clause = clauses[indClause] if isinstance(clauses[indClause], list) else list(clauses[indClause])
+            if len(clause) == 1:
+                # Unit clause, it will be propagated before any search
+                self.units.append(clause[0])
+            elif clause != []:
+                # Longer clause
+                self.formula.append([indClause, clause])
+                watchClause(self.watches, self.arena, clause)
+        self.residual = ResidualFormula(self.formula, nVariables)
+        self.binaryGraph = BinaryImplicationGraph(self.formula, nVariables)
+        self.implications.clear()
+
+    ###################################### Unit Propagation #####################################
+
+    # Unassign literals assigned during the unit propagation
+    def undoPropagations(self, propagated):
+        for lit in propagated:
+            self.assigned[lit] = 0
+            self.toAssign[lit] = 0
+
+    # Update the clauses we have to consider for the pigeon hole detection
+    # The binary clauses found are also exclusions, their literals are visited in turn
+    def updateConsider(self, exclusion, consider):
+        residual = self.residual
+        toVisit = list(exclusion[1])
+        while toVisit:
+            lit = toVisit.pop()
+            # We look for the clauses which are not already considered and which falsify one of the
+            # literals of the exclusion
+            for indClause in residual.occurrences[-lit]:
+                if not consider[self.formula[indClause][0]] and residual.active[indClause]:
+                    # The clause is not satisfied after the unit propagation, we have to consider it
+                    consider[self.formula[indClause][0]] = True
+                    simpClause = residual.simplifyClause(indClause)
+                    if len(simpClause) == 2:
+                        # We have found a binary clause, we consider it as an exclusion
+                        toVisit.extend(simpClause)
+
+    # Perform the unit propagation (toPropagate is a FIFO queue, a deque)
+    # If we keep the modifications, the propagated literals are also assigned in the residual formula
+    # and they have to be unassigned with backtrack
+    def unitPropagation(self, literal, toPropagate, marksLiterals, marker, ignoreConflicts, keepModifs):
+        assigned, toAssign = self.assigned, self.toAssign
+        propagated = []
+        if keepModifs and toPropagate:
+            # The assignment changes, the implications are not valid anymore
+            self.implications.clear()
+        while toPropagate:
+            # We get the first literal to propagate
+            propagate = toPropagate.popleft()
+            propagated.append(propagate)
+            assigned[propagate] = 1
+            toAssign[propagate] = 0
+            if keepModifs:
+                self.residual.assign(propagate)
+            # We mark the literal if it is different from the starting one
+            if propagate != literal:
+                updateMark(marksLiterals, -propagate, marker)
+            if propagate != 0:
+                # We update the watches concerned by the opposite of the propagated literal
+                resWatch = replaceWatch(self.watches, self.arena, -propagate, assigned, toAssign, toPropagate, ignoreConflicts)
+                if not resWatch:
+                    # We have found an empty clause, so we have a conflict
+                    if not keepModifs:
+                        self.undoPropagations(propagated)
+                    elif self.heuristic is not None:
+                        self.heuristic.conflict(propagated)
+                    while toPropagate:
+                        a = toPropagate.pop()
+                        toAssign[a] = 0
+                    return ("UNSAT", propagated)
+        # If we don't want to keep the modificatons, we have to unassign the propagated literals
+        if not keepModifs:
+            self.undoPropagations(propagated)
+        return ("UNKNOWN", propagated)
+
+    # Unassign the literals propagated while keeping the modifications
+    def backtrack(self, propagated):
+        self.residual.backtrack(len(self.residual.trail) - len(propagated))
+        self.undoPropagations(propagated)
+        self.implications.clear()
+        if self.heuristic is not None:
+            self.heuristic.unassigned(propagated)
+
+    # Get the literals implied by a literal under the current assignment (the literal included)
+    # The implications are cached until the assignment changes, the least recently used ones are
+    # evicted when the cache is full
+    def implied(self, literal):
+        implications = self.implications
+        if literal in implications:
+            implications.move_to_end(literal)
+            return implications[literal]
+        _, propagations = self.unitPropagation(literal, deque([literal]), [], 0, True, False)
+        implication = frozenset(propagations)
+        implications[literal] = implication
+        if len(implications) > self.cacheSize:
+            implications.popitem(last=False)
+        return implication
+
+    # Get the formula simplified by the current assignment and update the clauses we have to consider
+    def residualFormula(self, toConsider):
+        simpFormula = self.residual.clauses()
+        if toConsider != []:
+            # We have to consider a clause if it is not satisfied by the unit propagation and if
+            # at least one of its literals is falsified
+            for indClause in self.residual.reduced:
+                simpClause = self.residual.simplified[indClause]
+                if not toConsider[simpClause[0]]:
+                    toConsider[simpClause[0]] = True
+                    if len(simpClause[1]) == 2:
+                        # We have found a binary clause, we consider it as an exclusion
+                        self.updateConsider(simpClause, toConsider)
+        return simpFormula
+
+    # Get the literals that have been assigned
+    def getAssignedLiterals(self):
+        res = []
+        for var in range(1, self.nVariables + 1):
+            if self.assigned[var] == 1:
+                res.append(var)
+            elif self.assigned[-var] == 1:
+                res.append(-var)
+        return res
+
+    ###################################### Pigeon Detection #####################################
+
+    # Mark the clauses and literals according to the unit propagation of each literal of a clause
+    def analyseClause(self, cnf, indClause, marksLiterals):
+        for ind, literal in enumerate(cnf[indClause][1]):
+            # The mark of the literal at the position ind is the bit ind
+            bit = 1 << ind
+            marksLiterals[literal] |= bit
+            for propagate in self.implied(literal):
+                # We mark the literal if it is different from the starting one
+                if propagate != literal:
+                    marksLiterals[-propagate] |= bit
+        return marksLiterals
+
+    # Check if a clause can be selected to construct a pigeon hole
+    def canSelect(self, currentClause, current):
+        for indLiteral in range(len(currentClause[1])):
+            # Try to find the exclusions for each literal in the clause
+            findLiterals = [-cl[1][indLiteral] for cl in current]
+            literal = currentClause[1][indLiteral]
+            # The exclusions are usually binary clauses, so we first look for them in the implication
+            # graph (the literals of the residual formula are unassigned, so a literal reachable from
+            # an other one is also propagated by it)
+            if self.binaryGraph.impliesAll(literal, findLiterals):
+                continue
+            # Check if we propagate all the exclusions
+            propagations = self.implied(literal)
+            for lit in findLiterals:
+                if lit not in propagations:
+                    return False
+        return True
+
+    # Check if a literal excludes an other one (it propagates its opposite)
+    def excludes(self, literal, other):
+        return self.binaryGraph.impliesAll(literal, [-other]) or -other in self.implied(literal)
+
+    # Get the literals which can still fill each hole of a pigeon hole in construction: the literals
+    # put in the hole by a reordering of the remaining clauses which exclude all the literals of the hole
+    # holes are the literals which could fill the holes before the clauses added to the pigeon hole
+    # (None if all the literals of the remaining clauses are possible)
+    def holeLiterals(self, holes, added, remain):
+        if holes is None:
+            holes = [set() for _ in range(len(added[0][1]))]
+            for cl in remain:
+                for hole in range(len(cl[1])):
+                    holes[hole].add(cl[1][hole])
+        else:
+            literals = {lit for cl in remain for lit in cl[1]}
+            holes = [[lit for lit in hole if lit in literals] for hole in holes]
+        return [frozenset(lit for lit in holes[hole] if all(self.excludes(lit, cl[1][hole]) for cl in added))
+                for hole in range(len(holes))]
+
+    # Try to construct a pigeon hole starting from a specific clause
+    # masks gives the bitmask of the variables of each candidate (indexed by clause identifier)
+    # The construction uses an explicit stack: each level holds the remaining clauses which can expand
+    # the current pigeon hole, the index of the next one to try, the remaining clauses after the last
+    # clause tried (with the number of different clauses in them), the literals which can fill each hole
+    # (computed when a clause is added) and the key of the partial pigeon hole
+    # The reorderings of a candidate follow each other and exclude each other (same variables), so
+    # they have the same remaining clauses: these are computed once per candidate and the reorderings
+    # of a candidate without enough remaining clauses are skipped before checking the exclusions
+    # The completions of a partial pigeon hole only depend on its size, on its remaining clauses and on
+    # the literals which can fill each hole, whatever the order of the holes (the holes of a completion
+    # can be reordered the same way). The key of a partial pigeon hole gives these in a canonical order
+    # of the holes, the partial pigeon holes with the key of one which could not be completed are skipped
+    # (e.g. the reorderings of a candidate which put symmetric literals in different holes)
+    def pigeonHoleConstruction(self, clause, remainingClauses, masks, currentPigeon, knownPigeons):
+        if self.pigeonComplete(clause, currentPigeon, knownPigeons):
+            return
+        visited = set()
+        # Without reorderings, the partial pigeon holes rarely have the same key
+        symmetric = len(remainingClauses) > len({cl[0] for cl in remainingClauses})
+        stack = [[remainingClauses, 0, None, None, 0, None, None]]
+        while stack:
+            level = stack[-1]
+            remainingClauses, indCl = level[0], level[1]
+            if indCl >= len(remainingClauses):
+                # All the clauses of the level have been tried, we remove the clause added for it
+                stack.pop()
+                if stack:
+                    if level[6] is not None:
+                        visited.add(level[6])
+                    currentPigeon.pop()
+                continue
+            level[1] += 1
+            candidate = remainingClauses[indCl]
+            if candidate[0] != level[2]:
+                # Select the remaining clauses which don't intersect with the candidate
+                added = masks[candidate[0]]
+                level[2] = candidate[0]
+                level[3] = [cl for cl in remainingClauses[indCl + 1:] if masks[cl[0]] & added == 0]
+                level[4] = len({cl[0] for cl in level[3]})
+            remain = level[3]
+            # Next iteration of the construction if we have enough candidates and if the candidate
+            # can expand the current pigeon hole
+            if level[4] + len(currentPigeon) + 1 > len(clause[1]) and self.canSelect(candidate, currentPigeon):
+                currentPigeon.append(candidate)
+                if not self.pigeonComplete(clause, currentPigeon, knownPigeons):
+                    if not symmetric or len(currentPigeon) == len(clause[1]):
+                        # No key without reorderings or if the next clause completes the pigeon hole (it
+                        # would not save anything)
+                        stack.append([remain, 0, None, None, 0, None, None])
+                        continue
+                    if level[5] is None:
+                        level[5] = self.holeLiterals(None, currentPigeon[:-1], remainingClauses)
+                    holes = self.holeLiterals(level[5], [candidate], remain)
+                    key = (len(currentPigeon), frozenset(cl[0] for cl in remain), tuple(sorted(tuple(sorted(hole)) for hole in holes)))
+                    if key not in visited:
+                        stack.append([remain, 0, None, None, 0, holes, key])
+                        continue
+                currentPigeon.pop()
+                if knownPigeons != []:
+                    # We stop the construction, the clauses added for the levels are removed
+                    for _ in range(len(stack) - 1):
+                        currentPigeon.pop()
+                    return
+
+    # Try to construct a pigeon hole starting from a specific clause with a clique search
+    # The candidates (reordered clauses) which can expand the current pigeon hole are the vertices of a
+    # graph, two candidates are adjacent if they have no common variable and if the literals of each
+    # position exclude each other (the literal of the last candidate excludes the one of the first),
+    # so the pigeon holes are the cliques of the missing size (see clique.py)
+    # The adjacency is built with bitsets: for each position, the candidates whose literal at this
+    # position is excluded by a literal, and for each clause, the candidates without common variable
+    def pigeonHoleClique(self, clause, remainingClauses, masks, currentPigeon, knownPigeons):
+        if self.pigeonComplete(clause, currentPigeon, knownPigeons):
+            return
+        size = len(clause[1]) + 1 - len(currentPigeon)
+        vertices = [cl for cl in remainingClauses if self.canSelect(cl, currentPigeon)]
+        byClause = {}
+        for ind in range(len(vertices)):
+            byClause[vertices[ind][0]] = byClause.get(vertices[ind][0], 0) | (1 << ind)
+        if len(byClause) < size:
+            return
+        # Candidates of the clauses without common variable with each clause
+        disjoint = {}
+        for ident in byClause:
+            disjoint[ident] = 0
+            for other, bitset in byClause.items():
+                if masks[ident] & masks[other] == 0:
+                    disjoint[ident] |= bitset
+        # Candidates whose literal at each position is excluded by each literal of this position, and
+        # candidates whose literal at each position excludes it
+        excluded, excluding = [], []
+        for hole in range(len(clause[1])):
+            atHole = {}
+            for ind in range(len(vertices)):
+                lit = vertices[ind][1][hole]
+                atHole[lit] = atHole.get(lit, 0) | (1 << ind)
+            excludedAtHole = dict.fromkeys(atHole, 0)
+            excludingAtHole = dict.fromkeys(atHole, 0)
+            for lit, bitset in atHole.items():
+                for other, others in atHole.items():
+                    if self.excludes(lit, other):
+                        excludedAtHole[lit] |= others
+                        excludingAtHole[other] |= bitset
+            excluded.append(excludedAtHole)
+            excluding.append(excludingAtHole)
+        # Build the adjacency: the first candidates excluded by a candidate and the next ones excluding it
+        adjacency = []
+        for ind in range(len(vertices)):
+            before, after = (1 << ind) - 1, ~((1 << (ind + 1)) - 1)
+            for hole in range(len(clause[1])):
+                lit = vertices[ind][1][hole]
+                before &= excluded[hole][lit]
+                after &= excluding[hole][lit]
+            adjacency.append(disjoint[vertices[ind][0]] & (before | after))
+        clique = findClique(adjacency, size)
+        if clique is not None:
+            self.pigeonComplete(clause, currentPigeon + [vertices[ind] for ind in sorted(clique)], knownPigeons)
+
+    # Check if the current pigeon hole is complete (one more clause than the size of the starting clause)
+    # and register it in this case
+    def pigeonComplete(self, clause, currentPigeon, knownPigeons):
+        if len(currentPigeon) > len(clause[1]):
+            # We have found a new pigeon hole problem
+            newPigeon = deepcopy(currentPigeon)
+            newPigeon.sort(key=(lambda x : x[0]))
+            if newPigeon not in knownPigeons:
+                knownPigeons.append(newPigeon)
+            return True
+        return False
+
+    # Build the candidates if we start the pigeon detection from a specific clause and launch the detection
+    # The candidates are the indexes of the clauses of the same size than the starting clause
+    def pigeonHoleDetection(self, formula, indClause, candidates, knownPigeons, marksLiterals):
+        blocked, clauses = self.blocked, self.clauses
+        # The variables of the starting clause are not assigned, so a candidate has a common variable
+        # with the starting clause only if its complete clause has one
+        startVariables = {abs(lit) for lit in formula[indClause][1]}
+        # The clauses of a residual formula often have the same literals: such candidates are symmetric
+        # (same exclusions, same variables), only the first one is kept since it can be replaced by
+        # the others in any pigeon found from them
+        seen = set()
+        selected = []
+        for indCand in candidates:
+            if blocked[formula[indCand][0]] == 0:
+                # Check if there is no common variable with the first clause
+                if startVariables.isdisjoint(abs(lit) for lit in clauses[formula[indCand][0]]):
+                    literals = frozenset(formula[indCand][1])
+                    if literals not in seen:
+                        seen.add(literals)
+                        selected.append(indCand)
+        # A pigeon hole needs one candidate per position of the starting clause: the starting clauses
+        # without enough candidates are rejected before the propagations and the combinations
+        needed = len(formula[indClause][1])
+        if len(selected) < needed:
+            return
+        # Get the marks of the literals according to the starting clause
+        marksLiterals = self.analyseClause(formula, indClause, marksLiterals)
+        # Get the marks of the literals of all the selected candidates (one row per candidate)
+        kept, rows = markMatrix(marksLiterals, [formula[indCand][1] for indCand in selected], needed)
+        if len(kept) < needed:
+            return
+        # Keep the candidates with at least one combination, the combinations are generated lazily
+        # and the first one is kept
+        viable = []
+        for ind, row in zip(kept, rows):
+            marks = unitPropagationBitmask(row, -1, needed)
+            if marks != []:
+                combis = combinations(formula[indClause], marks, [])
+                first = next(combis, None)
+                if first is not None:
+                    viable.append((selected[ind], first, combis))
+        #Try to construct pigeon hole problems if we have enough candidates
+        if len(viable) < needed:
+            return
+        # Reorder the literals for each combination (the literal with the mark i is put at the
+        # position i)
+        # The variables of the candidates are numbered for this detection only, so their bitmasks
+        # only have a bit per variable of the candidates
+        correspClauses = []
+        masks = {}
+        numbering = {}
+        for indCand, first, combis in viable:
+            masks[formula[indCand][0]] = variablesMask(formula[indCand][1], numbering)
+            for combi in chain([first], combis):
+                reordered = [0] * len(combi)
+                for lit, mark in zip(formula[indCand][1], combi):
+                    reordered[mark.bit_length() - 1] = lit
+                correspClauses.append([formula[indCand][0], reordered])
+        if self.construction == "clique":
+            self.pigeonHoleClique(formula[indClause], correspClauses, masks, [formula[indClause]], knownPigeons)
+        else:
+            self.pigeonHoleConstruction(formula[indClause], correspClauses, masks, [formula[indClause]], knownPigeons)
+
+    # Perform the pigeon hole detection on each clause we have to consider
+    # formula is the residual formula of the current node (see residualFormula)
+    # If the detector has a cache, a residual formula already seen is not analysed again: the results are
+    # found by the fingerprint of the residual formula, the pigeons found are checked against the formula
+    def pigeonPur(self, formula, consider):
+        knownPigeons = None
+        if self.cache is not None:
+            key = residualKey(self.residual.fingerprint(consider), self.minPigeons, self.maxPigeons)
+            stored = self.cache.get(key)
+            if stored is not None:
+                knownPigeons = self.restorePigeons(formula, stored)
+        if knownPigeons is None:
+            # Group the clauses by size to get the candidates of each starting clause
+            bySize = self.clausesBySize(formula)
+            if self.processes > 1:
+                knownPigeons = self.pigeonPurParallel(formula, consider, bySize)
+            else:
+                knownPigeons = self.pigeonPurSequential(formula, consider, bySize)
+            if self.cache is not None:
+                self.cache.put(key, [[list(clause[1]) for clause in pigeon] for pigeon in knownPigeons])
+        if self.heuristic is not None and knownPigeons != []:
+            self.heuristic.detected(knownPigeons)
+        self.output.pigeons(knownPigeons)
+        return knownPigeons
+
+    # Build the pigeons of a residual formula from the literals of their clauses (stored in the cache)
+    # If several clauses have the same literals, we take the first one
+    # Return None if a clause is not in the formula (the stored result is not the one of the formula)
+    def restorePigeons(self, formula, stored):
+        if stored == []:
+            return []
+        identifiers = {}
+        for clause in formula:
+            identifiers.setdefault(frozenset(clause[1]), clause[0])
+        pigeons = []
+        for clauses in stored:
+            pigeon = []
+            for lits in clauses:
+                identifier = identifiers.get(frozenset(lits))
+                if identifier is None:
+                    return None
+                pigeon.append([identifier, lits])
+            pigeon.sort(key=(lambda x : x[0]))
+            pigeons.append(pigeon)
+        return pigeons
+
+    # Try each starting clause in turn, a starting clause is blocked for the next ones
+    def pigeonPurSequential(self, formula, consider, bySize):
+        knownPigeons = []
+        blocked, marksLiterals = self.blocked, self.marksLiterals
+        blocked[:] = bytes(len(blocked))
+        for indClause in range(len(formula)):
+            # We check if we have to consider the current clause
+            # If it is the clause, we block it
+            if consider[formula[indClause][0]]:
+                blocked[formula[indClause][0]] = 1
+                marksLiterals[:] = [0] * len(marksLiterals)
+                # Begin the pigeon detection if the clause is of the correct size
+                if len(formula[indClause][1]) >= self.minPigeons and len(formula[indClause][1]) <= self.maxPigeons:
+                    self.pigeonHoleDetection(formula, indClause, bySize[len(formula[indClause][1])], knownPigeons, marksLiterals)
+                    # If we have found a pigeon hole, we stop the function
+                    if knownPigeons != []:
+                        break
+        return knownPigeons
+
+    # Look for a pigeon from one starting clause, the considered clauses before it are blocked
+    # (same state as in the sequential detection)
+    # The starting clauses of a shard are ascending: the clauses up to the previous starting clause
+    # (previous, -1 for the first one) are already blocked, only the next ones are blocked
+    def detectFrom(self, formula, consider, bySize, indClause, previous=-1):
+        knownPigeons = []
+        blocked, marksLiterals = self.blocked, self.marksLiterals
+        if previous < 0:
+            blocked[:] = bytes(len(blocked))
+        marksLiterals[:] = [0] * len(marksLiterals)
+        for ind in range(previous + 1, indClause + 1):
+            if consider[formula[ind][0]]:
+                blocked[formula[ind][0]] = 1
+        self.pigeonHoleDetection(formula, indClause, bySize[len(formula[indClause][1])], knownPigeons, marksLiterals)
+        return knownPigeons
+
+    # Get the clauses of each size (indexes in the formula), the candidates of the starting clauses
+    def clausesBySize(self, formula):
+        bySize = {}
+        for indClause in range(len(formula)):
+            bySize.setdefault(len(formula[indClause][1]), []).append(indClause)
+        return bySize
+
+    # Get the starting clauses of a detection (indexes in the formula)
+    def startingClauses(self, formula, consider):
+        return [indClause for indClause in range(len(formula)) if consider[formula[indClause][0]]
+                and self.minPigeons <= len(formula[indClause][1]) <= self.maxPigeons]
+
+    # Fork the pool of processes sharing the starting clauses (if it is not already there)
+    # The pool is kept for the next detections, until closePool is called or a new formula is loaded
+    def openPool(self):
+        global _poolState
+        if self.pool is None:
+            context = multiprocessing.get_context("fork")
+            self.poolFound = context.Value("i", 0)
+            _poolState = (self, self.poolFound)
+            self.pool = context.Pool(self.processes)
+            _poolState = None
+
+    # Stop the processes of the pool
+    def closePool(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+            self.poolFound = None
+
+    # Share the starting clauses between the processes of a pool
+    # Each process always gets the same starting clauses (one every processes clauses) and the pigeon
+    # kept is the one of the first starting clause, so the result does not depend on the scheduling
+    # The pool is forked once (see openPool), the processes are given the literals assigned on the node
+    def pigeonPurParallel(self, formula, consider, bySize):
+        starts = self.startingClauses(formula, consider)
+        if len(starts) < 2:
+            return self.pigeonPurSequential(formula, consider, bySize)
+        self.openPool()
+        self.poolFound.value = len(formula)
+        trail = list(self.residual.trail)
+        results = self.pool.map(_detectShard, [(shard, trail, consider) for shard in range(self.processes)])
+        results = [result for result in results if result[0] is not None]
+        if results == []:
+            return []
+        return min(results, key=(lambda x : x[0]))[1]
+
+    # Detect the pigeons of a formula simplified by an assignment (list of literals)
+    # Only the clauses flagged in consider (indexed by clause identifier) are used as starting clauses
+    # The structures are reused if the formula is the last loaded one
+    def detect(self, formula, assignment=[], consider=None):
+        if formula is not self.clauses:
+            self.load(formula)
+        if consider is None:
+            consider = [True] * self.nClauses
+        # Build the literals to propagate: the unit clauses and the assignment
+        toPropagate = deque()
+        for lit in self.units + list(assignment):
+            if self.toAssign[-lit] == 1:
+                # Contradictory assignment, there is nothing to detect
+                for a in toPropagate:
+                    self.toAssign[a] = 0
+                return []
+            if self.toAssign[lit] == 0:
+                self.toAssign[lit] = 1
+                toPropagate.append(lit)
+        ans, propagations = self.unitPropagation(0, toPropagate, [], -1, False, True)
+        if ans == "UNSAT":
+            self.backtrack(propagations)
+            return []
+        pigeons = self.pigeonPur(self.residualFormula([]), consider)
+        self.backtrack(propagations)
+        return pigeons
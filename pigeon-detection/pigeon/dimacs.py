@@ -0,0 +1,82 @@
+#################################################################################################
+########################################## Imports ##############################################
+#################################################################################################
+
+
+import bz2
+import gzip
+import lzma
+from array import array
+
+
+#################################################################################################
+########################################### DIMACS ##############################################
+#################################################################################################
+
+
+# Open an instance, the compressed instances (.gz, .xz, .bz2) are decompressed while they are read
+def openDimacs(filename):
+    if filename.endswith(".gz"):
+        return gzip.open(filename, "rt")
+    if filename.endswith(".xz"):
+        return lzma.open(filename, "rt")
+    if filename.endswith(".bz2"):
+        return bz2.open(filename, "rt")
+    return open(filename, "r")
+
+# Read an instance in the DIMACS format
+# Return the number of variables and the list of clauses, each clause being an array('i') of literals
+# The file is read line by line: a clause ends with a 0 and can span several lines, a line can contain
+# several clauses. The header is optional, so is the 0 of the last clause
+def readDimacs(filename):
+    nVariables = None
+    clauses = []
+    nClauses = 0
+    clause = array('i')
+    with openDimacs(filename) as file:
+        for line in file:
+            line = line.strip()
+            if line == "" or line[0] == 'c':
+                continue
+            if line[0] == 'p':
+                # Get the number of variables and preallocate the clauses
+                header = line.split()
+                nVariables = int(header[2])
+                if len(header) > 3:
+                    clauses = [None] * int(header[3])
+                continue
+            if line[0] == '%':
+                # End of the clauses (SATLIB format)
+                break
+            for lit in map(int, line.split()):
+                if lit != 0:
+                    clause.append(lit)
+                    continue
+                # End of the current clause
+                if nClauses < len(clauses):
+                    clauses[nClauses] = clause
+                else:
+                    clauses.append(clause)
+                nClauses += 1
+                clause = array('i')
+    if len(clause) > 0:
+        # The last clause has no final 0
+        if nClauses < len(clauses):
+            clauses[nClauses] = clause
+        else:
+            clauses.append(clause)
+        nClauses += 1
+    # The header can announce more clauses than the file contains
+    del clauses[nClauses:]
+    if nVariables is None:
+        nVariables = max((abs(lit) for clause in clauses for lit in clause), default=0)
+    return (nVariables, clauses)
+
+# Read an order of the decisions (order.txt of the C++ solvers): signed literals separated by blanks,
+# the sign of a literal gives its first branch
+def readOrder(filename):
+    order = array('i')
+    with openDimacs(filename) as file:
+        for line in file:
+            order.extend(map(int, line.split()))
+    return order
@@ -0,0 +1,319 @@
+#################################################################################################
+########################################## Imports ##############################################
+#################################################################################################
+
+
+import io
+import multiprocessing
+import resource
+import sys
+from collections import deque
+from contextlib import redirect_stdout
+from time import perf_counter
+
+from .heuristics import decisionHeuristic
+from .registry import KnownPigeons
+
+
+#################################################################################################
+############################################ DPLL ###############################################
+#################################################################################################
+
+
+# Chose the next variable (next decision), its negation is decided first
+# heuris is either an empty list (no heuristic) or a heuristic (see heuristics.py), the drivers turn
+# a list of decisions into a DecisionOrder
+def choseNextVariable(detector, heuris):
+    if not isinstance(heuris, list):
+        return heuris.pick()
+    for i in range(1, detector.nVariables + 1):
+        # Chose the first free variable
+        if detector.assigned[i] == 0 and detector.assigned[-i] == 0:
+            return i
+    return None
+
+# Get the peak memory used by the process (in MB)
+def usedMemory():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# DPLL search on the formula loaded in the detector, trying to detect pigeons at each node
+# The search uses an explicit stack of the nodes whose children are being explored (their propagations,
+# the decided variable, the answer of the first child and their level), so it can be paused after any
+# node and resumed later (the detector stays on the current node meanwhile)
+# If split = (depth, subtrees) is given, the nodes at this depth are not explored: their decisions
+# are stored in subtrees, a mark is printed and a placeholder is returned instead of their answers
+class DpllSearch:
+
+    # Create a search starting with the propagation of a literal (0 for the root) and of toPropagate
+    def __init__(self, detector, registry, nextPropagation, toPropagate, decisions, level, heuris, split=None):
+        self.detector = detector
+        self.registry = registry
+        self.toPropagate = toPropagate
+        self.decisions = decisions
+        self.heuris = heuris
+        self.split = split
+        self.stack = []
+        self.pending = (nextPropagation, level)
+        self.answer = None
+        self.pauseRequested = False
+
+    # Ask the search to stop after the current node (e.g. from a signal handler)
+    def pause(self):
+        self.pauseRequested = True
+
+    # Check if the search is over
+    def finished(self):
+        return self.answer is not None
+
+    # Explore the nodes until the end of the search (return its answer) or until a pause has been asked
+    # or a budget is exhausted: maxNodes nodes, maxTime seconds or maxMemory MB used by the process
+    # (return None, run can be called again to resume the search), the budgets are checked between two nodes
+    def run(self, maxNodes=None, maxTime=None, maxMemory=None):
+        nodes = 0
+        startTime = perf_counter()
+        self.pauseRequested = False
+        while not self.finished():
+            if self.pauseRequested or (maxNodes is not None and nodes >= maxNodes):
+                return None
+            if maxTime is not None and perf_counter() - startTime >= maxTime:
+                return None
+            if maxMemory is not None and usedMemory() >= maxMemory:
+                return None
+            nextPropagation, level = self.pending
+            nodes += 1
+            answer = self.enterNode(nextPropagation, level)
+            # Give the answers to the parent nodes until a node has a child to explore
+            while answer is not None:
+                if self.stack == []:
+                    self.answer = answer
+                    break
+                answer = self.childExplored(answer)
+        return self.answer
+
+    # Propagate the decision of a node and try to find pigeons
+    # Return the answer of the node if it is a leaf, None if its first child has to be explored
+    def enterNode(self, nextPropagation, level):
+        detector, decisions, toPropagate = self.detector, self.decisions, self.toPropagate
+        if self.split is not None and level == self.split[0]:
+            toPropagate.clear()
+            self.split[1].append((decisions.copy(), self.heuris.copy()))
+            print(SUBTREE_MARK)
+            return [["SUBTREE", len(self.split[1]) - 1]]
+        toConsider = detector.toConsider
+        # Reinitialize the values of the list of clauses to consider
+        if nextPropagation != 0:
+            for indClause in range(len(toConsider)):
+                toConsider[indClause] = False
+        # Propagate the new decision and simplify the formula
+        ans, propagations = detector.unitPropagation(nextPropagation, toPropagate, [], -1, False, True)
+        if ans == "UNKNOWN":
+            # Try to find pigeons
+            pigeons = detector.pigeonPur(detector.residualFormula(toConsider), toConsider)
+            if pigeons == []:
+                # No pigeon hole has been detected
+                detector.output.node(decisions, [])
+            else:
+                # Check if the detected pigeon is already known
+                name = self.registry.register(pigeons[0])
+                # Print the result of the search and unassign the propagated literals
+                detector.output.node(decisions, name)
+                assignedLiterals = detector.getAssignedLiterals()
+                detector.backtrack(propagations)
+                return [["UNSAT", level, name, decisions.copy(), assignedLiterals]]
+            # Chose the next variable
+            nextVar = choseNextVariable(detector, self.heuris)
+            if nextVar is None:
+                # SAT
+                assignedLiterals = detector.getAssignedLiterals()
+                detector.backtrack(propagations)
+                return [["SAT", assignedLiterals]]
+            # First child (negative decision)
+            self.stack.append([propagations, nextVar, None, level])
+            decisions.append(-nextVar)
+            toPropagate.append(-nextVar)
+            self.pending = (-nextVar, level + 1)
+            return None
+        else:
+            # UNSAT
+            detector.output.node(decisions, "UNSAT")
+            assignedLiterals = detector.getAssignedLiterals()
+            detector.backtrack(propagations)
+            return [["UNSAT", level, [], decisions.copy(), assignedLiterals]]
+
+    # Give the answer of a child to the node on the top of the stack
+    # Return the answer of the node if both children have been explored, None if its second child has
+    # to be explored
+    def childExplored(self, answer):
+        detector, decisions = self.detector, self.decisions
+        node = self.stack[-1]
+        propagations, nextVar, answer1, level = node
+        decisions.pop()
+        # Check if we have found an assignment with the child
+        lastAnswer = answer[-1]
+        if lastAnswer[0] == "SAT":
+            self.stack.pop()
+            detector.backtrack(propagations)
+            return [lastAnswer]
+        if answer1 is None:
+            # Second child (positive decision)
+            node[2] = answer
+            decisions.append(nextVar)
+            self.toPropagate.append(nextVar)
+            self.pending = (nextVar, level + 1)
+            return None
+        # Build the answer to the parent node
+        answer1.extend(answer)
+        self.stack.pop()
+        detector.backtrack(propagations)
+        return answer1
+
+# Perform a complete DPLL search on the formula loaded in the detector (see DpllSearch)
+def dpll(detector, registry, nextPropagation, toPropagate, decisions, level, heuris, split=None):
+    return DpllSearch(detector, registry, nextPropagation, toPropagate, decisions, level, heuris, split).run()
+
+# Run the DPLL search from the root of the formula loaded in the detector
+# If processes > 1, the subtrees at depth splitDepth are explored by a pool of processes
+# heuris is a heuristic or a list of decisions (signed literals, see DecisionOrder)
+# The search stops when a budget is exhausted (see DpllSearch.run), it then returns None
+def search(detector, registry, heuris=[], processes=1, splitDepth=0, maxNodes=None, maxTime=None, maxMemory=None):
+    heuris = decisionHeuristic(detector, heuris)
+    try:
+        if processes > 1 and splitDepth > 0:
+            deadline = perf_counter() + maxTime if maxTime is not None else None
+            return parallelSearch(detector, registry, heuris, processes, splitDepth, (maxNodes, deadline, maxMemory))
+        for ind in range(len(detector.toConsider)):
+            detector.toConsider[ind] = True
+        toPropagate = deque()
+        for lit in detector.units:
+            detector.assigned[lit] = 1
+            toPropagate.append(lit)
+        return DpllSearch(detector, registry, 0, toPropagate, [], 0, heuris).run(maxNodes, maxTime, maxMemory)
+    finally:
+        # The pool of the detections is kept for the whole search
+        detector.closePool()
+
+
+#################################################################################################
+####################################### Parallel DPLL ###########################################
+#################################################################################################
+
+
+# Line printed in place of a subtree explored by the pool
+SUBTREE_MARK = "\0subtree"
+
+# Detector, subtrees and budgets used by the processes of the pool (inherited when the processes are
+# forked)
+_poolState = None
+
+# Run a part of the parallel search within the budgets: the maximum number of nodes of the part, the
+# time when all the parts stop and the maximum memory used by the process
+def _runPart(dpllSearch, budget):
+    maxNodes, deadline, maxMemory = budget
+    maxTime = deadline - perf_counter() if deadline is not None else None
+    return dpllSearch.run(maxNodes, maxTime, maxMemory)
+
+# Explore a subtree in a process of the pool
+# The decisions leading to the subtree are propagated again from the root (the nodes above it have
+# already been explored), then the subtree is explored with its own registry and its output is kept
+def _exploreSubtree(indSubtree):
+    detector, subtrees, budget = _poolState
+    decisions, heuris = subtrees[indSubtree]
+    # A process of the pool can't fork the processes of the detections, they are done sequentially
+    detector.processes = 1
+    if not isinstance(heuris, list):
+        heuris.attach(detector)
+    for ind in range(len(detector.toConsider)):
+        detector.toConsider[ind] = True
+    toPropagate = deque()
+    for lit in detector.units:
+        detector.assigned[lit] = 1
+        toPropagate.append(lit)
+    toPropagate.extend(decisions[:-1])
+    _, propagations = detector.unitPropagation(0, toPropagate, [], -1, False, True)
+    registry = KnownPigeons()
+    output = io.StringIO()
+    try:
+        with redirect_stdout(output):
+            dpllSearch = DpllSearch(detector, registry, decisions[-1], deque([decisions[-1]]), decisions, len(decisions), heuris)
+            answer = _runPart(dpllSearch, budget)
+    finally:
+        # The results of the subtree are written in the cache before the process leaves
+        if detector.cache is not None:
+            detector.cache.close()
+    detector.backtrack(propagations)
+    return (answer, output.getvalue(), registry.pigeons)
+
+# Print the output of a part of the search, the names of the pigeons (found in pigeons, by name) are
+# replaced by the names given by the registry of the complete search
+def printRenamed(nodeOutput, output, registry, pigeons):
+    rename = (lambda name : registry.register(pigeons[name]))
+    for line in output.splitlines(keepends=True):
+        sys.stdout.write(nodeOutput.renamed(line, rename))
+
+# Run the DPLL search with a pool of processes
+# The tree is explored in the parent process down to splitDepth and the subtrees below are explored
+# by the pool (a free process takes the next subtree). The outputs, the answers and the names of the
+# pigeons are merged in the order of the sequential search, which stops at the first SAT answer
+# Each subtree starts with a copy of the heuristic left when it is reached
+# The budget (maxNodes, deadline, maxMemory) applies to the top of the tree and to each subtree, the
+# search returns None as soon as one of them is stopped
+def parallelSearch(detector, registry, heuris, processes, splitDepth, budget=(None, None, None)):
+    global _poolState
+    # Explore the top of the tree
+    subtrees, splitPigeons = [], KnownPigeons()
+    for ind in range(len(detector.toConsider)):
+        detector.toConsider[ind] = True
+    toPropagate = deque()
+    for lit in detector.units:
+        detector.assigned[lit] = 1
+        toPropagate.append(lit)
+    output = io.StringIO()
+    with redirect_stdout(output):
+        answer = _runPart(DpllSearch(detector, splitPigeons, 0, toPropagate, [], 0, heuris, (splitDepth, subtrees)), budget)
+    segments = output.getvalue().split(SUBTREE_MARK + "\n")
+    nodeOutput = detector.output
+    if answer is None:
+        # The top of the tree has not been explored within the budget
+        printRenamed(nodeOutput, "".join(segments), registry, splitPigeons.pigeons)
+        return None
+    if answer[-1][0] == "SAT":
+        # The answer of the top of the tree only keeps the assignment, but the sequential search
+        # explores the subtrees found before it
+        answer = [["SUBTREE", indSubtree] for indSubtree in range(len(subtrees))] + answer
+    # Explore the subtrees and merge the results
+    result = []
+    # The pool of the detections of the top of the tree is not inherited by the new processes
+    detector.closePool()
+    _poolState = (detector, subtrees, budget)
+    # Each subtree is explored by a new process, so its result does not depend on the other subtrees
+    # explored by the same process (the order of the watches changes with the propagations)
+    pool = multiprocessing.get_context("fork").Pool(processes, maxtasksperchild=1) if subtrees != [] else None
+    try:
+        results = pool.imap(_exploreSubtree, range(len(subtrees))) if pool is not None else None
+        for entry in answer:
+            if entry[0] == "SUBTREE":
+                printRenamed(nodeOutput, segments[entry[1]], registry, splitPigeons.pigeons)
+                subAnswer, subOutput, subPigeons = next(results)
+                printRenamed(nodeOutput, subOutput, registry, subPigeons)
+                if subAnswer is None:
+                    # The subtree has not been explored within the budget
+                    return None
+                entries = [(subEntry, subPigeons) for subEntry in subAnswer]
+            else:
+                entries = [(entry, splitPigeons.pigeons)]
+            for subEntry, pigeons in entries:
+                if subEntry[0] == "SAT":
+                    # The sequential search stops at the first SAT answer
+                    if entry[0] != "SUBTREE":
+                        printRenamed(nodeOutput, segments[-1], registry, splitPigeons.pigeons)
+                    return [subEntry]
+                if subEntry[2] != []:
+                    subEntry[2] = registry.register(pigeons[subEntry[2]])
+                result.append(subEntry)
+        printRenamed(nodeOutput, segments[-1], registry, splitPigeons.pigeons)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        _poolState = None
+    return result
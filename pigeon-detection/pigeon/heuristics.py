@@ -0,0 +1,278 @@
+#################################################################################################
+######################################## Variable Heap ##########################################
+#################################################################################################
+
+
+# Binary heap of variables ordered by decreasing score (the smallest variable first for equal scores)
+# indices gives the position of each variable in the heap (-1 if it is not in the heap), so the score
+# of a variable can be increased in O(log n)
+class VariableHeap:
+
+    # Create a heap containing all the variables, scores[var] is the score of the variable var
+    def __init__(self, scores):
+        self.scores = scores
+        self.heap = []
+        self.indices = [-1] * len(scores)
+        for var in range(1, len(scores)):
+            self.insert(var)
+
+    # Check if a variable comes before another one
+    def before(self, var, other):
+        return self.scores[var] > self.scores[other] or (self.scores[var] == self.scores[other] and var < other)
+
+    # Move up a variable of the heap
+    def percolateUp(self, ind):
+        heap, indices = self.heap, self.indices
+        var = heap[ind]
+        while ind > 0:
+            parent = (ind - 1) >> 1
+            if not self.before(var, heap[parent]):
+                break
+            heap[ind] = heap[parent]
+            indices[heap[ind]] = ind
+            ind = parent
+        heap[ind] = var
+        indices[var] = ind
+
+    # Move down a variable of the heap
+    def percolateDown(self, ind):
+        heap, indices = self.heap, self.indices
+        var = heap[ind]
+        while 2 * ind + 1 < len(heap):
+            child = 2 * ind + 1
+            if child + 1 < len(heap) and self.before(heap[child + 1], heap[child]):
+                child += 1
+            if not self.before(heap[child], var):
+                break
+            heap[ind] = heap[child]
+            indices[heap[ind]] = ind
+            ind = child
+        heap[ind] = var
+        indices[var] = ind
+
+    # Check if a variable is in the heap
+    def contains(self, var):
+        return self.indices[var] >= 0
+
+    # Add a variable to the heap (if it is not already in it)
+    def insert(self, var):
+        if self.indices[var] < 0:
+            self.heap.append(var)
+            self.percolateUp(len(self.heap) - 1)
+
+    # Update the position of a variable whose score has been increased
+    def increased(self, var):
+        if self.indices[var] >= 0:
+            self.percolateUp(self.indices[var])
+
+    # Remove and return the first variable of the heap (None if the heap is empty)
+    def pop(self):
+        if self.heap == []:
+            return None
+        first, last = self.heap[0], self.heap.pop()
+        self.indices[first] = -1
+        if self.heap != []:
+            self.heap[0] = last
+            self.percolateDown(0)
+        return first
+
+    # Copy the heap (the scores are also copied)
+    def copy(self):
+        other = VariableHeap.__new__(VariableHeap)
+        other.scores = self.scores.copy()
+        other.heap = self.heap.copy()
+        other.indices = self.indices.copy()
+        return other
+
+
+#################################################################################################
+######################################### Heuristics ############################################
+#################################################################################################
+
+
+# Decision heuristic choosing the free variable with the best score, kept in a heap
+# The assigned variables are removed from the heap when a decision is chosen and inserted again when
+# they are unassigned by a backtrack, so each decision costs O(log n) (amortized)
+# The detector notifies its heuristic of the backtracks, of the conflicts and of the detected pigeons
+# A heuristic can also be attached to a residual formula (the drivers searching on a ResidualFormula)
+# A heuristic can be given instead of the list of decisions to the DPLL drivers
+class Heuristic:
+
+    # Create a heuristic for the formula loaded in the detector, scores[var] is the initial score of var
+    def __init__(self, detector, scores):
+        self.detector = detector
+        self.order = VariableHeap(scores)
+        self.attach(detector)
+
+    # Make the heuristic the one notified by a detector
+    def attach(self, detector):
+        self.detector = detector
+        detector.heuristic = self
+
+    # Chose the next variable (None if all the variables are assigned)
+    def pick(self):
+        assigned = self.detector.assigned
+        var = self.order.pop()
+        while var is not None and (assigned[var] == 1 or assigned[-var] == 1):
+            var = self.order.pop()
+        return var
+
+    # The literals have been unassigned, their variables can be chosen again
+    def unassigned(self, literals):
+        for lit in literals:
+            if lit != 0:
+                self.order.insert(abs(lit))
+
+    # A propagation has led to a conflict (the propagated literals are given)
+    def conflict(self, literals):
+        pass
+
+    # Some pigeons have been detected on the current node
+    def detected(self, pigeons):
+        pass
+
+    # Increase the score of a variable
+    def bump(self, var, value):
+        self.order.scores[var] += value
+        self.order.increased(var)
+
+    # Copy the heuristic (used to explore several subtrees)
+    def copy(self):
+        other = self.__class__.__new__(self.__class__)
+        other.__dict__.update(self.__dict__)
+        other.order = self.order.copy()
+        return other
+
+
+# Count the occurrences of each variable in the clauses of the formula loaded in the detector
+# (only the clauses whose size is accepted by sizes)
+def countOccurrences(detector, sizes=(lambda size : True)):
+    counts = [0] * (detector.nVariables + 1)
+    for clause in detector.formula:
+        if sizes(len(clause[1])):
+            for lit in clause[1]:
+                counts[abs(lit)] += 1
+    return counts
+
+
+# Heuristic choosing the variable with the most occurrences in the formula
+class OccurrenceHeuristic(Heuristic):
+
+    # Create the heuristic for the formula loaded in the detector
+    def __init__(self, detector):
+        Heuristic.__init__(self, detector, countOccurrences(detector))
+
+
+# VSIDS-like heuristic: the variables of the propagations leading to a conflict get more activity,
+# the older conflicts count less and less (the increment grows by 1 / decay at each conflict)
+# The initial activity is the number of occurrences of the variable
+class VsidsHeuristic(Heuristic):
+
+    # Create the heuristic for the formula loaded in the detector
+    def __init__(self, detector, decay=0.95):
+        counts = countOccurrences(detector)
+        total = max(sum(counts), 1)
+        Heuristic.__init__(self, detector, [count / total for count in counts])
+        self.decay = decay
+        self.increment = 1.0
+
+    # Bump the variables of a conflict and decay the older activities
+    def conflict(self, literals):
+        for lit in literals:
+            if lit != 0:
+                self.bump(abs(lit), self.increment)
+        self.increment /= self.decay
+        if self.increment > 1e100:
+            # Rescale the activities to avoid an overflow
+            scores = self.order.scores
+            for var in range(len(scores)):
+                scores[var] *= 1e-100
+            self.increment *= 1e-100
+
+
+# Heuristic choosing first the variables of the pigeon structures: the variables of the binary clauses
+# (the exclusions of the pigeons) and of the clauses of the sizes of the pigeons are preferred, the
+# variables of a detected pigeon are bumped so the next decisions are made on the structure
+class PigeonFirstHeuristic(Heuristic):
+
+    # Create the heuristic for the formula loaded in the detector
+    def __init__(self, detector):
+        exclusions = countOccurrences(detector, lambda size : size == 2)
+        candidates = countOccurrences(detector, lambda size : detector.minPigeons <= size <= detector.maxPigeons)
+        Heuristic.__init__(self, detector, [exclusions[var] + candidates[var] for var in range(len(exclusions))])
+        self.increment = max(self.order.scores, default=0) + 1
+
+    # Bump the variables of the detected pigeons
+    def detected(self, pigeons):
+        for pigeon in pigeons:
+            for clause in pigeon:
+                for lit in clause[1]:
+                    self.bump(abs(lit), self.increment)
+
+
+# Forced order of the decisions, like the forceOrder option of the C++ solvers (file order.txt)
+# The order is a list of literals: the sign of a literal gives its first branch. The next decision is
+# found with a cursor (the order is shared by the whole search, as in the C++ solvers, and the
+# variables already assigned are skipped), the heuristic then takes over when the order is exhausted
+# (the first free variable if it is None)
+class DecisionOrder:
+
+    # Create the order of the decisions for the formula loaded in the detector
+    def __init__(self, detector, literals, then=None):
+        self.literals = literals
+        self.cursor = 0
+        self.then = then
+        self.attach(detector)
+
+    # Make the order (and the heuristic used after it) the one notified by a detector
+    def attach(self, detector):
+        self.detector = detector
+        if self.then is not None:
+            self.then.attach(detector)
+        detector.heuristic = self
+
+    # Chose the next variable (None if all the variables are assigned), its negation is decided first
+    def pick(self):
+        assigned, literals = self.detector.assigned, self.literals
+        while self.cursor < len(literals):
+            lit = literals[self.cursor]
+            self.cursor += 1
+            if assigned[lit] == 0 and assigned[-lit] == 0:
+                return -lit
+        if self.then is not None:
+            return self.then.pick()
+        for var in range(1, self.detector.nVariables + 1):
+            # Chose the first free variable
+            if assigned[var] == 0 and assigned[-var] == 0:
+                return var
+        return None
+
+    # The literals have been unassigned
+    def unassigned(self, literals):
+        if self.then is not None:
+            self.then.unassigned(literals)
+
+    # A propagation has led to a conflict
+    def conflict(self, literals):
+        if self.then is not None:
+            self.then.conflict(literals)
+
+    # Some pigeons have been detected on the current node
+    def detected(self, pigeons):
+        if self.then is not None:
+            self.then.detected(pigeons)
+
+    # Copy the order (used to explore several subtrees)
+    def copy(self):
+        other = DecisionOrder.__new__(DecisionOrder)
+        other.__dict__.update(self.__dict__)
+        if self.then is not None:
+            other.then = self.then.copy()
+        return other
+
+
+# Get the heuristic given to the DPLL drivers: a non empty list is a precomputed order of the decisions
+def decisionHeuristic(detector, heuris):
+    if isinstance(heuris, list) and heuris != []:
+        return DecisionOrder(detector, heuris)
+    return heuris
@@ -0,0 +1,57 @@
+#################################################################################################
+########################################## Imports ##############################################
+#################################################################################################
+
+
+from .bitmasks import literalBit
+
+
+#################################################################################################
+################################## Binary Implication Graph #####################################
+#################################################################################################
+
+
+# Implication graph of the binary clauses of a formula: the clause [a, b] gives the edges -a -> b
+# and -b -> a
+# The literals reachable from a literal (its transitive closure) are computed the first time they
+# are asked and kept as a bitset (bit literalBit(lit) is set if lit is reachable)
+class BinaryImplicationGraph:
+
+    # Build the edges of the binary clauses of a formula (list of [id, literals])
+    def __init__(self, formula, nVariables):
+        self.successors = [[] for _ in range(2 * nVariables + 1)]
+        self.closures = [None] * (2 * nVariables + 1)
+        for clause in formula:
+            if len(clause[1]) == 2:
+                lit, other = clause[1][0], clause[1][1]
+                self.successors[-lit].append(other)
+                self.successors[-other].append(lit)
+
+    # Get the bitset of the literals reachable from a literal (the literal included)
+    def reachable(self, literal):
+        closure = self.closures[literal]
+        if closure is not None:
+            return closure
+        closure = 1 << literalBit(literal)
+        toVisit = [literal]
+        while toVisit:
+            lit = toVisit.pop()
+            for succ in self.successors[lit]:
+                bit = 1 << literalBit(succ)
+                if closure & bit == 0:
+                    if self.closures[succ] is not None:
+                        # The closure of the successor is already known, we don't visit it again
+                        closure |= self.closures[succ]
+                    else:
+                        closure |= bit
+                        toVisit.append(succ)
+        self.closures[literal] = closure
+        return closure
+
+    # Check if all the literals of a list are reachable from a literal
+    def impliesAll(self, literal, literals):
+        closure = self.reachable(literal)
+        for lit in literals:
+            if (closure >> literalBit(lit)) & 1 == 0:
+                return False
+        return True
@@ -0,0 +1,97 @@
+#################################################################################################
+########################################## Imports ##############################################
+#################################################################################################
+
+
+import json
+import sys
+
+
+#################################################################################################
+########################################### Output ##############################################
+#################################################################################################
+
+
+# Output modes: the text of the original scripts, one JSON object per line or no output on the nodes
+MODES = ("text", "jsonl", "none")
+
+# Output of the results of the search (the result of each node, the detected pigeons, the final
+# answer and the registry), written on the current sys.stdout so it can be captured
+# With the "none" mode, only the final answer and the registry are printed (as text)
+class NodeOutput:
+
+    # Create an output in one of the modes
+    def __init__(self, mode="text"):
+        if mode not in MODES:
+            raise ValueError("unknown output mode: " + str(mode))
+        self.mode = mode
+
+    # Print the result of the detection on a node: "UNSAT" (conflict), the name of the pigeon found
+    # or [] if there is none
+    def node(self, decisions, result):
+        if self.mode == "text":
+            if result == []:
+                print(decisions, "-> []\n")
+            elif result == "UNSAT":
+                print(decisions, "-> UNSAT\n")
+            else:
+                print(decisions, "->", result, "\n")
+        elif self.mode == "jsonl":
+            if result == []:
+                entry = {"decisions": decisions, "result": "NONE"}
+            elif result == "UNSAT":
+                entry = {"decisions": decisions, "result": "UNSAT"}
+            else:
+                entry = {"decisions": decisions, "result": "PIGEON", "pigeon": result}
+            sys.stdout.write(json.dumps(entry) + "\n")
+
+    # Print the pigeons detected on a node
+    def pigeons(self, pigeons):
+        if self.mode == "text":
+            for pigeon in pigeons:
+                print("pigeon =", pigeon)
+        elif self.mode == "jsonl":
+            for pigeon in pigeons:
+                sys.stdout.write(json.dumps({"clauses": [[clause[0], list(clause[1])] for clause in pigeon]}) + "\n")
+
+    # Rename the pigeon of a line printed by node (rename gives the new name of a pigeon name)
+    def renamed(self, line, rename):
+        if self.mode == "jsonl":
+            if line.startswith('{"decisions"'):
+                entry = json.loads(line)
+                if entry["result"] == "PIGEON":
+                    entry["pigeon"] = rename(entry["pigeon"])
+                    line = json.dumps(entry) + "\n"
+            return line
+        head, sep, name = line.rpartition(" -> ")
+        if sep != "" and name.startswith("ph"):
+            line = head + sep + rename(name.strip()) + " \n"
+        return line
+
+    # Print the final answer of a search (None if a budget has been exhausted)
+    def answer(self, answer):
+        if self.mode == "jsonl":
+            if answer is None:
+                sys.stdout.write(json.dumps({"answer": "UNKNOWN"}) + "\n")
+            for entry in answer or []:
+                if entry[0] == "SAT":
+                    sys.stdout.write(json.dumps({"answer": "SAT", "assignment": list(entry[1])}) + "\n")
+                else:
+                    sys.stdout.write(json.dumps({"answer": "UNSAT", "level": entry[1], "pigeon": entry[2],
+                                                 "decisions": list(entry[3])}) + "\n")
+            return
+        print("\nFinal result:")
+        if answer is None:
+            print("UNKNOWN (budget exhausted)")
+            return
+        for entry in answer:
+            print(entry)
+
+    # Print all the pigeons of a registry
+    def registry(self, registry):
+        if self.mode == "jsonl":
+            for name in registry.known.values():
+                pigeon = registry.pigeons[name]
+                sys.stdout.write(json.dumps({"name": name, "clauses": [[clause[0], list(clause[1])] for clause in pigeon]}) + "\n")
+            return
+        registry.printPigeons()
@@ -0,0 +1,42 @@
+#################################################################################################
+########################################## Registry #############################################
+#################################################################################################
+
+
+# Get the fingerprint of a pigeon (list of [id, literals]): the set of its clauses, each clause being
+# its identifier and the set of its literals, so the order of the clauses and of the literals is ignored
+def fingerprint(pigeon):
+    return frozenset((clause[0], frozenset(clause[1])) for clause in pigeon)
+
+
+# Registry of the detected pigeons, each pigeon is named according to its size
+# (e.g. ph3-2_1 is the first pigeon detected with 3 clauses of 2 literals)
+# The pigeons are identified by their fingerprint
+class KnownPigeons:
+
+    # Create an empty registry
+    def __init__(self):
+        self.known = {}
+        self.pigeons = {}
+        self.cptSize = {}
+
+    # Register a pigeon if it is not already known and return its name
+    def register(self, pigeon):
+        key = fingerprint(pigeon)
+        if key not in self.known:
+            # If it is not the case, we register it
+            atleasts = len(pigeon)
+            atmosts = len(pigeon[0][1])
+            if (atleasts, atmosts) not in self.cptSize:
+                self.cptSize[(atleasts, atmosts)] = 0
+            self.cptSize[(atleasts, atmosts)] += 1
+            name = "ph" + str(atleasts) + "-" + str(atmosts) + "_" + str(self.cptSize[(atleasts, atmosts)])
+            self.known[key] = name
+            self.pigeons[name] = pigeon
+        return self.known[key]
+
+    # Print all the detected pigeons
+    def printPigeons(self):
+        print("\nDetected pigeons:")
+        for name in self.known.values():
+            print("\n", name, "=", self.pigeons[name])
@@ -0,0 +1,95 @@
+#################################################################################################
+######################################### Reservoirs ############################################
+#################################################################################################
+
+
+# Uniform sample of at most capacity branches among all the branches offered (reservoir sampling)
+class BranchReservoir:
+
+    # Create an empty reservoir, rng is a random.Random object
+    def __init__(self, capacity, rng):
+        self.capacity = capacity
+        self.rng = rng
+        self.branches = []
+        self.offered = 0
+
+    # Offer a branch to the reservoir, return True if it is kept (for now)
+    def offer(self, branch):
+        self.offered += 1
+        if len(self.branches) < self.capacity:
+            self.branches.append(branch)
+            return True
+        # The n-th branch replaces a kept one with probability capacity / n
+        ind = self.rng.randrange(self.offered)
+        if ind < self.capacity:
+            self.branches[ind] = branch
+            return True
+        return False
+
+    # Remove a random branch, the reservoir then keeps one branch less (the branches left are still a
+    # uniform sample of the branches offered), return the removed branch
+    def evict(self):
+        ind = self.rng.randrange(len(self.branches))
+        removed = self.branches[ind]
+        self.branches[ind] = self.branches[-1]
+        self.branches.pop()
+        self.capacity = len(self.branches)
+        return removed
+
+    # Get the branches kept for now
+    def kept(self):
+        return self.branches
+
+    # Get the sampled branches
+    def sample(self):
+        return self.branches
+
+
+# Sample of at most capacity branches stratified by depth: each depth has its own reservoir and the
+# capacity is shared between the depths. When more than capacity branches are kept, a random branch of
+# the depth with the most branches (the deepest one for equal numbers) is removed and this depth keeps
+# one branch less, so the depths get equal shares and a depth with too few branches leaves its share
+# to the others
+class StratifiedReservoir:
+
+    # Create an empty stratified reservoir, rng is a random.Random object
+    def __init__(self, capacity, rng):
+        self.capacity = capacity
+        self.rng = rng
+        self.strata = {}
+        self.size = 0
+
+    # Offer a branch to the reservoir of its depth, return True if it is kept (for now)
+    def offer(self, branch):
+        if len(branch) not in self.strata:
+            self.strata[len(branch)] = BranchReservoir(self.capacity, self.rng)
+        stratum = self.strata[len(branch)]
+        size = len(stratum.branches)
+        if not stratum.offer(branch):
+            return False
+        self.size += len(stratum.branches) - size
+        if self.size <= self.capacity:
+            return True
+        # The depth with the most branches gives one back
+        largest = max(self.strata, key=(lambda depth : (len(self.strata[depth].branches), depth)))
+        self.size -= 1
+        return self.strata[largest].evict() is not branch
+
+    # Get the branches kept for now
+    def kept(self):
+        return [branch for stratum in self.strata.values() for branch in stratum.branches]
+
+    # Get the sampled branches, taken in turn from each depth (ascending order)
+    def sample(self):
+        strata = []
+        for depth in sorted(self.strata):
+            stratum = self.strata[depth].sample()
+            strata.append(self.rng.sample(stratum, len(stratum)))
+        branches = []
+        ind = 0
+        while len(branches) < self.capacity and any(ind < len(stratum) for stratum in strata):
+            for stratum in strata:
+                if ind < len(stratum) and len(branches) < self.capacity:
+                    branches.append(stratum[ind])
+            ind += 1
+        return branches
@@ -0,0 +1,181 @@
+#################################################################################################
+########################################## Imports ##############################################
+#################################################################################################
+
+
+from array import array
+from collections import deque
+from itertools import compress
+from operator import and_
+
+
+#################################################################################################
+######################################### Functions #############################################
+#################################################################################################
+
+
+# Mask of the integers of 64 bits
+MASK64 = (1 << 64) - 1
+
+# Mix the bits of an integer of 64 bits (finalizer of splitmix64)
+def mix64(x):
+    x = ((x ^ (x >> 30)) * 0xbf58476d1ce4e5b9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94d049bb133111eb) & MASK64
+    return x ^ (x >> 31)
+
+# Get the hash of a clause (list of literals), whatever the order of its literals
+def clauseHash(literals):
+    return mix64(sum(mix64(lit & MASK64) for lit in literals) & MASK64)
+
+
+#################################################################################################
+###################################### Residual Formula #########################################
+#################################################################################################
+
+
+# Residual formula (formula simplified by the current assignment) maintained incrementally
+# Each literal has the list of the clauses where it occurs and each clause counts its satisfied and
+# falsified literals, so assigning a literal only visits the clauses containing its variable
+# The occurrences and the counters are stored in arrays, and a clause is only copied when it loses a
+# literal (the simplified clause of an intact clause is the clause of the formula)
+# The assigned literals are stored on a trail, backtracking unassigns the end of the trail
+# Once a fingerprint has been asked, the hash of each clause is kept with its simplified clause and the
+# sum of the hashes of the active clauses is kept up to date (see fingerprint)
+# The values of the literals are also given as assigned, like in the detector, so a heuristic can be
+# attached to the residual formula (see heuristics.py): it is notified of the backtracks and of the
+# conflicts
+class ResidualFormula:
+
+    # Build the occurrence lists of a formula (list of [id, literals])
+    def __init__(self, formula, nVariables):
+        self.formula = formula
+        self.nVariables = nVariables
+        self.value = [0] * (2 * nVariables + 1)
+        self.assigned = self.value
+        self.occurrences = [array('i') for _ in range(2 * nVariables + 1)]
+        for indClause in range(len(formula)):
+            for lit in formula[indClause][1]:
+                self.occurrences[lit].append(indClause)
+        self.satisfied = array('i', bytes(4 * len(formula)))
+        self.falsified = array('i', bytes(4 * len(formula)))
+        self.active = bytearray(b"\x01") * len(formula)
+        self.simplified = list(formula)
+        self.dirty = set()
+        self.reduced = set()
+        self.trail = []
+        self.hashes = None
+        self.hashSum = 0
+        self.heuristic = None
+
+    # Assign a literal and update the counters of the clauses containing its variable
+    def assign(self, lit):
+        self.trail.append(lit)
+        self.value[lit] = 1
+        for indClause in self.occurrences[lit]:
+            self.satisfied[indClause] += 1
+            if self.satisfied[indClause] == 1:
+                # The clause is now satisfied
+                self.active[indClause] = 0
+                self.reduced.discard(indClause)
+                if self.hashes is not None:
+                    self.hashSum = (self.hashSum - self.hashes[indClause]) & MASK64
+        for indClause in self.occurrences[-lit]:
+            self.falsified[indClause] += 1
+            self.dirty.add(indClause)
+            if self.satisfied[indClause] == 0:
+                self.reduced.add(indClause)
+
+    # Unassign the literals of the trail after a position
+    def backtrack(self, position):
+        if self.heuristic is not None:
+            self.heuristic.unassigned(self.trail[position:])
+        while len(self.trail) > position:
+            lit = self.trail.pop()
+            self.value[lit] = 0
+            for indClause in self.occurrences[-lit]:
+                self.falsified[indClause] -= 1
+                self.dirty.add(indClause)
+                if self.falsified[indClause] == 0:
+                    self.reduced.discard(indClause)
+            for indClause in self.occurrences[lit]:
+                self.satisfied[indClause] -= 1
+                if self.satisfied[indClause] == 0:
+                    # The clause is not satisfied anymore
+                    self.active[indClause] = 1
+                    if self.falsified[indClause] > 0:
+                        self.reduced.add(indClause)
+                    if self.hashes is not None:
+                        self.hashSum = (self.hashSum + self.hashes[indClause]) & MASK64
+
+    # Get the literals of a clause which are not falsified
+    def simplifyClause(self, indClause):
+        return [lit for lit in self.formula[indClause][1] if self.value[-lit] == 0]
+
+    # Get the residual formula: the clauses which are not satisfied, without their falsified literals
+    # Only the clauses modified since the last call are simplified again
+    def clauses(self):
+        stale = set()
+        for indClause in self.dirty:
+            if self.active[indClause]:
+                if self.falsified[indClause] == 0:
+                    # The clause has all its literals again
+                    self.simplified[indClause] = self.formula[indClause]
+                else:
+                    self.simplified[indClause] = [self.formula[indClause][0], self.simplifyClause(indClause)]
+                if self.hashes is not None:
+                    # The hash of the clause counted in the sum is replaced
+                    newHash = clauseHash(self.simplified[indClause][1])
+                    self.hashSum = (self.hashSum + newHash - self.hashes[indClause]) & MASK64
+                    self.hashes[indClause] = newHash
+            else:
+                # A satisfied clause is simplified again when it becomes active
+                stale.add(indClause)
+        self.dirty = stale
+        return list(compress(self.simplified, self.active))
+
+    # Get the fingerprint of the residual formula and of its clauses flagged in consider (indexed by clause
+    # identifier): the sums of the hashes of their clauses, so the order of the clauses and of the
+    # literals is ignored (the fingerprint is the one of the last call to clauses)
+    # The hashes are computed at the first call, they are then updated with the clauses: the fingerprint
+    # of the residual formula is kept up to date and the one of the clauses of consider is a sum
+    def fingerprint(self, consider):
+        if self.hashes is None:
+            self.hashes = array('Q', (clauseHash(self.simplifyClause(indClause)) for indClause in range(len(self.formula))))
+            self.ids = array('i', (clause[0] for clause in self.formula))
+            self.hashSum = sum(compress(self.hashes, self.active)) & MASK64
+        starts = sum(compress(self.hashes, map(and_, self.active, map(consider.__getitem__, self.ids)))) & MASK64
+        return (self.hashSum, starts)
+
+    # Perform the unit propagation using the counters (stop at the first conflict)
+    # onReduce(indClause) is called each time a clause which is not satisfied loses a literal
+    # Return the answer, the propagated literals and the clauses used to propagate them
+    def propagate(self, toPropagate, onReduce=None):
+        toPropagate = deque(toPropagate)
+        toAssign = set(toPropagate)
+        propagated, reasons = [], {}
+        while toPropagate:
+            # We propagate the first literal in the list
+            propagate = toPropagate.popleft()
+            toAssign.discard(propagate)
+            propagated.append(propagate)
+            self.assign(propagate)
+            # Look for the simplified clauses
+            for indClause in self.occurrences[-propagate]:
+                if self.satisfied[indClause] > 0:
+                    continue
+                if onReduce is not None:
+                    onReduce(indClause)
+                size = len(self.formula[indClause][1]) - self.falsified[indClause]
+                if size == 0:
+                    # Empty clause -> UNSAT
+                    if self.heuristic is not None:
+                        self.heuristic.conflict(propagated)
+                    return ("UNSAT", propagated, reasons)
+                if size == 1:
+                    # We have found a unit clause
+                    unit = self.simplifyClause(indClause)[0]
+                    if self.value[unit] == 0 and unit not in toAssign:
+                        toPropagate.append(unit)
+                        toAssign.add(unit)
+                        reasons[unit] = indClause
+        return ("UNKNOWN", propagated, reasons)
@@ -0,0 +1,276 @@
+#################################################################################################
+########################################## Imports ##############################################
+#################################################################################################
+
+
+import io
+import random
+import sys
+from collections import deque
+from contextlib import redirect_stdout
+from time import perf_counter
+
+from .dpll import choseNextVariable, usedMemory
+from .heuristics import decisionHeuristic
+from .reservoir import BranchReservoir, StratifiedReservoir
+
+
+#################################################################################################
+########################################## Sampling #############################################
+#################################################################################################
+
+
+# Sampler selecting some UNSAT branches during a DPLL search, the pigeon detection is then performed
+# on the nodes of the selected branches
+# The branches are selected according to a strategy:
+#  - "ratio": one branch every ratioBranches branches, the search stops after maxBranches branches
+#  - "reservoir": uniform sample of maxBranches branches among all the branches of the search
+#  - "stratified": sample of maxBranches branches shared equally between the depths of the branches
+# The branches kept by the random strategies can be replaced until the end of the search, only the
+# final sample is explored (see streamNode for the detection during the search)
+# The random strategies use a generator initialized with seed. The search also stops when one of the
+# budgets is exhausted: maxLeaves leaves, maxNodes nodes, maxTime seconds or maxMemory MB used by the
+# process
+# A branch is only stored as its decisions: the selected branches are merged in a prefix trie and the
+# state of each node is derived from the state of its parent by propagating one decision
+class BranchSampler:
+
+    # Create a sampler working on the formula loaded in the detector
+    def __init__(self, detector, ratioBranches=100, maxBranches=100, strategy="ratio", seed=None,
+                 maxLeaves=None, maxNodes=None, maxTime=None, maxMemory=None):
+        self.detector = detector
+        self.ratioBranches = ratioBranches
+        self.maxBranches = maxBranches
+        self.strategy = strategy
+        self.maxLeaves = maxLeaves
+        self.maxNodes = maxNodes
+        self.maxTime = maxTime
+        self.maxMemory = maxMemory
+        if strategy == "reservoir":
+            self.reservoir = BranchReservoir(maxBranches, random.Random(seed))
+        elif strategy == "stratified":
+            self.reservoir = StratifiedReservoir(maxBranches, random.Random(seed))
+        elif strategy == "ratio":
+            self.reservoir = None
+        else:
+            raise ValueError("unknown sampling strategy: " + str(strategy))
+        self.cptBranch = -1
+        self.cptLeaves = 0
+        self.cptNodes = 0
+        self.startTime = None
+        self.longuestBranch = 0
+        self.branches = []
+        self.explored = set()
+        self.streamed = {}
+        self.streamedLimit = maxBranches
+
+    # Check if the search has to stop (enough branches or a budget is exhausted)
+    def stopped(self):
+        if self.reservoir is None and len(self.branches) >= self.maxBranches:
+            return True
+        if self.maxLeaves is not None and self.cptLeaves >= self.maxLeaves:
+            return True
+        if self.maxNodes is not None and self.cptNodes >= self.maxNodes:
+            return True
+        if self.maxTime is not None and perf_counter() - self.startTime >= self.maxTime:
+            return True
+        if self.maxMemory is not None and usedMemory() >= self.maxMemory:
+            return True
+        return False
+
+    # Select (or not) an UNSAT branch, return True if it is kept in the sample
+    def selectBranch(self, decisions):
+        if self.reservoir is not None:
+            return self.reservoir.offer(decisions.copy())
+        self.cptBranch = (self.cptBranch + 1) % self.ratioBranches
+        if self.cptBranch == 0:
+            self.branches.append(decisions.copy())
+            return True
+        return False
+
+    # Perform a dpll search and select some branches
+    # If a registry is given, the detection is performed on a node as soon as its children have been
+    # explored, if one of its leaves has been selected (see streamNode)
+    # The search uses an explicit stack of the nodes whose children are being explored (their
+    # propagations, the decided variable, if a leaf below them has been selected and if their first child
+    # is being explored)
+    # Return True if a leaf has been selected
+    def dpllSearch(self, nextPropagation, toPropagate, decisions, heuris, registry=None):
+        detector = self.detector
+        stack = []
+        while True:
+            self.cptNodes += 1
+            # Propagate the new decision
+            ans, propagations = detector.unitPropagation(nextPropagation, toPropagate, [], -1, False, True)
+            if ans == "UNKNOWN":
+                # Chose the next variable
+                nextVar = choseNextVariable(detector, heuris)
+                if nextVar is not None:
+                    # First child (negative decision)
+                    stack.append([propagations, nextVar, False, True])
+                    decisions.append(-nextVar)
+                    toPropagate.append(-nextVar)
+                    nextPropagation = -nextVar
+                    continue
+                # SAT
+                self.cptLeaves += 1
+                selected = False
+            else:
+                # UNSAT, we check if we have to select the branch
+                self.cptLeaves += 1
+                selected = self.selectBranch(decisions)
+            detector.backtrack(propagations)
+            # Give the result to the parent nodes until a node has a child to explore
+            while True:
+                if stack == []:
+                    return selected
+                node = stack[-1]
+                propagations, nextVar = node[0], node[1]
+                decisions.pop()
+                node[2] = node[2] or selected
+                # Check if we have to stop the search
+                if node[3] and not self.stopped():
+                    # Second child (positive decision)
+                    node[3] = False
+                    decisions.append(nextVar)
+                    toPropagate.append(nextVar)
+                    nextPropagation = nextVar
+                    break
+                selected = node[2]
+                if selected and registry is not None:
+                    self.streamNode(decisions, registry)
+                stack.pop()
+                detector.backtrack(propagations)
+
+    # Run the sampling search from the root of the formula loaded in the detector
+    # If a registry is given, the detection starts during the search (see dpllSearch)
+    # heuris is a heuristic or a list of decisions (signed literals, see DecisionOrder)
+    def search(self, heuris=[], registry=None):
+        heuris = decisionHeuristic(self.detector, heuris)
+        self.startTime = perf_counter()
+        toPropagate = deque()
+        for lit in self.detector.units:
+            self.detector.assigned[lit] = 1
+            toPropagate.append(lit)
+        try:
+            self.dpllSearch(0, toPropagate, [], heuris, registry)
+        finally:
+            # The pool of the detections is kept for the whole search
+            self.detector.closePool()
+        if self.reservoir is not None:
+            self.branches = self.reservoir.sample()
+        for branch in self.branches:
+            self.longuestBranch = max(self.longuestBranch, len(branch))
+
+    # Print the result of the detection on a node and register the node as explored
+    def reportNode(self, decisions, pigeons, registry):
+        if pigeons == []:
+            # No pigeon hole has been detected
+            self.detector.output.node(decisions, [])
+        else:
+            # Check if the detected pigeon is already known and print the result of the search
+            self.detector.output.node(decisions, registry.register(pigeons[0]))
+        self.explored.add(tuple(decisions))
+
+    # Try to find pigeons on the current node of the detector
+    def detectNode(self, decisions, registry):
+        detector = self.detector
+        pigeons = detector.pigeonPur(detector.residualFormula([]), [True] * detector.nClauses)
+        self.reportNode(decisions, pigeons, registry)
+
+    # Detect the pigeons on the current node during the search, a leaf below it has been selected
+    # The branches selected by the ratio strategy are final: the result is printed and registered at once
+    # The branches kept by a reservoir can still be replaced: the result is only kept (streamed) if a
+    # kept branch goes through the node, tryDetection prints and registers the results of the nodes of
+    # the final sample. The results of the nodes left by all the kept branches are forgotten when the
+    # streamed results have doubled
+    def streamNode(self, decisions, registry):
+        if self.reservoir is None:
+            self.detectNode(decisions, registry)
+            return
+        kept = self.reservoir.kept()
+        if any(branch[:len(decisions)] == decisions for branch in kept):
+            self.detectTrieNode(decisions, self.streamed)
+            if len(self.streamed) > self.streamedLimit:
+                trie = self.buildTrie(kept)
+                for key in list(self.streamed):
+                    node = trie
+                    for decision in key:
+                        node = node.get(decision)
+                        if node is None:
+                            del self.streamed[key]
+                            break
+                self.streamedLimit = 2 * len(self.streamed) + self.maxBranches
+
+    # Build the prefix trie of the nodes to explore (the nodes above the leaves of some branches)
+    # A node of the trie is a dictionary giving the child reached by each decision
+    def buildTrie(self, branches):
+        trie = {}
+        for branch in branches:
+            node = trie
+            for decision in branch[:-1]:
+                node = node.setdefault(decision, {})
+        return trie
+
+    # Keep the pigeons and the output of the detection on the current node of the detector (indexed by
+    # its decisions) if it is not already explored or in the results
+    def detectTrieNode(self, decisions, results):
+        detector = self.detector
+        if tuple(decisions) not in self.explored and tuple(decisions) not in results:
+            output = io.StringIO()
+            with redirect_stdout(output):
+                pigeons = detector.pigeonPur(detector.residualFormula([]), [True] * detector.nClauses)
+            results[tuple(decisions)] = (pigeons, output.getvalue())
+
+    # Explore the trie from a node (the current node of the detector) and detect on each of its nodes
+    # The trie is explored in depth with an explicit stack of the nodes whose children are being explored
+    # (the remaining children and the propagations of the node), so the depth of the trie is not limited
+    # by the recursion limit
+    def detectTrie(self, node, decisions, results):
+        detector = self.detector
+        self.detectTrieNode(decisions, results)
+        stack = [(iter(node.items()), None)]
+        while stack != []:
+            children, propagations = stack[-1]
+            child = next(children, None)
+            if child is None:
+                # All the children have been explored, go back to the parent
+                stack.pop()
+                if propagations is not None:
+                    decisions.pop()
+                    detector.backtrack(propagations)
+                continue
+            decision, childNode = child
+            # The state of the child is derived from the state of the node
+            _, childPropagations = detector.unitPropagation(decision, deque([decision]), [], -1, False, True)
+            decisions.append(decision)
+            self.detectTrieNode(decisions, results)
+            stack.append((iter(childNode.items()), childPropagations))
+
+    # Try to find some pigeons on the selected branches
+    # The detection is performed once per node of the trie, the results are then printed from the levels
+    # of decisions (ascending order)
+    # The results streamed during the search are reused
+    def tryDetection(self, registry):
+        detector = self.detector
+        results, self.streamed = self.streamed, {}
+        if self.branches != []:
+            toPropagate = deque()
+            for lit in detector.units:
+                detector.assigned[lit] = 1
+                toPropagate.append(lit)
+            _, propagations = detector.unitPropagation(0, toPropagate, [], -1, False, True)
+            try:
+                self.detectTrie(self.buildTrie(self.branches), [], results)
+            finally:
+                detector.closePool()
+            detector.backtrack(propagations)
+        for back in range(1, self.longuestBranch + 1):
+            for indBranch in range(len(self.branches)):
+                if back <= len(self.branches[indBranch]):
+                    # Get the corresponding decisions
+                    decisions = self.branches[indBranch][:len(self.branches[indBranch]) - back:]
+                    if tuple(decisions) not in self.explored:
+                        pigeons, output = results[tuple(decisions)]
+                        sys.stdout.write(output)
+                        self.reportNode(decisions, pigeons, registry)
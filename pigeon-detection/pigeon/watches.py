@@ -0,0 +1,102 @@
+#################################################################################################
+####################################### Watch Literals ##########################################
+#################################################################################################
+
+
+# The watches of a literal are stored in an array('i') as pairs (blocking literal, clause reference)
+# The reference is the index of the clause in the arena, or -1 for a binary clause (the blocking
+# literal is then the other literal of the clause)
+BINARY = -1
+
+# Add a new watch for a specific clause
+def addWatch(watches, lit, other, ref):
+    watches[lit].append(other)
+    watches[lit].append(ref)
+
+# Add two watch literals to a clause, the clauses with more than two literals are stored in the arena
+def watchClause(watches, arena, clause):
+    lit, other = clause[0], clause[1]
+    ref = arena.add(clause) if len(clause) > 2 else BINARY
+    addWatch(watches, lit, other, ref)
+    addWatch(watches, other, lit, ref)
+
+# Look for a replacing literal in the clause beginning at start in the literals of the arena
+def searchReplacement(literals, start, size, assigned):
+    replacement, satisfied = None, False
+    for ind in range(start + 2, start + size):
+        if assigned[literals[ind]] == 1:
+            # The clause is satisfied
+            satisfied = True
+            break
+        elif assigned[-literals[ind]] == 0:
+            # We have found a replacement
+            replacement = ind
+            break
+    return (replacement, satisfied)
+
+# Update the watch literals concerned by a propagation
+# The watch list is compacted in place: the watches we keep are moved to the front (index j) while
+# we read the list (index i), the watches moved to another literal are dropped at the end
+def replaceWatch(watches, arena, notLit, assigned, toAssign, toProp, ignoreConflicts):
+    ws = watches[notLit]
+    literals, starts, sizes = arena.literals, arena.starts, arena.sizes
+    i, j, n = 0, 0, len(ws)
+    while i < n:
+        blocker, ref = ws[i], ws[i + 1]
+        i += 2
+        # We check if the blocking literal satisfies the clause
+        if assigned[blocker] == 1:
+            ws[j], ws[j + 1] = blocker, ref
+            j += 2
+            continue
+        # We check if we have a binary clause ...
+        if ref == BINARY:
+            ws[j], ws[j + 1] = blocker, ref
+            j += 2
+            if assigned[-blocker] == 1:
+                # The blocking literal is falsified, we have a conflict
+                if not ignoreConflicts:
+                    # We keep the watches we have not visited yet
+                    ws[j:j + n - i] = ws[i:n]
+                    del ws[j + n - i:]
+                    return False
+            elif assigned[blocker] == 0 and toAssign[blocker] == 0:
+                # The blocking literal is unassigned, we propagate it
+                toAssign[blocker] = 1
+                toProp.append(blocker)
+        # ... or a longer clause
+        else:
+            # We get the falsified literal and the blocking literal and we reorganize the beginning of the clause
+            start = starts[ref]
+            block = literals[start] ^ literals[start + 1] ^ notLit
+            literals[start] = notLit
+            literals[start + 1] = block
+            # We look for a replacement for the falsified literal
+            replacement, satisfied = searchReplacement(literals, start, sizes[ref], assigned)
+            if satisfied:
+                # The clause is satisfied
+                ws[j], ws[j + 1] = block, ref
+                j += 2
+                continue
+            if replacement is None:
+                # There is no replacement
+                ws[j], ws[j + 1] = block, ref
+                j += 2
+                if assigned[-block] == 1:
+                    # The blocking literal is falsified, we have a conflict
+                    if not ignoreConflicts:
+                        # We keep the watches we have not visited yet
+                        ws[j:j + n - i] = ws[i:n]
+                        del ws[j + n - i:]
+                        return False
+                elif assigned[block] == 0 and toAssign[block] == 0:
+                    # The blocking literal is unassigned, we propagate it
+                    toAssign[block] = 1
+                    toProp.append(block)
+            else:
+                # We have found a replacement, we swap it with the falsified literal
+                # (the replacement is not falsified, so it is never the literal of the current list)
+                literals[start], literals[replacement] = literals[replacement], literals[start]
+                addWatch(watches, literals[start], block, ref)
+    del ws[j:]
+    return True